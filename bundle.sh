@@ -1,4 +1,10 @@
 #!/bin/bash
 
+# Ship precompiled packs of the most commonly used built-in schematics
+for schematic in app entity flask-api; do
+    fz pack $schematic -o flaskerize/schematics/$schematic.fzpack
+done
+
 python setup.py sdist bdist_wheel
+rm -f flaskerize/schematics/*.fzpack
 twine upload dist/*
@@ -0,0 +1,46 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Keep persistent caches written by tests out of the real user cache"""
+
+    import flaskerize.discovery
+    import flaskerize.parser
+
+    monkeypatch.setenv("FLASKERIZE_CACHE_DIR", str(tmp_path / ".fz-cache"))
+    # Process-wide caches resolve their directory once, on first use
+    monkeypatch.setattr(flaskerize.parser, "_cli_template_cache", None)
+    monkeypatch.setattr(flaskerize.discovery, "_default_index", None)
+
+
+@pytest.fixture
+def make_schematic(tmp_path):
+    """
+    Factory writing a schematic under tmp_path/schematics that renders its
+    positional "greeting" argument into "{{ name }}.txt", e.g. "Hello thing!"
+    """
+
+    import os
+
+    def make_schematic(name: str = "doodad", static: bool = False) -> str:
+        schematic_path = os.path.join(tmp_path, "schematics", name)
+        files_path = os.path.join(schematic_path, "files")
+        os.makedirs(files_path)
+        with open(os.path.join(schematic_path, "schema.json"), "w") as fid:
+            fid.write('{"options": [{"arg": "greeting", "type": "str"}]}')
+        with open(os.path.join(files_path, "{{ name }}.txt.template"), "w") as fid:
+            fid.write("{{ greeting }} {{ name }}!")
+        if static:
+            with open(os.path.join(files_path, "static.txt"), "w") as fid:
+                fid.write("static")
+        return schematic_path
+
+    return make_schematic
+
+
+@pytest.fixture
+def schematic_path(make_schematic):
+    """Path of a schematic made by make_schematic, at tmp_path/schematics/doodad"""
+
+    return make_schematic()
@@ -1,2 +1,13 @@
-from .render import SchematicRenderer  # noqa
+from typing import Any
+
 from .custom_functions import register_custom_function, registered_funcs  # noqa
+
+
+def __getattr__(name: str) -> Any:
+    # The renderer pulls in Jinja and PyFilesystem, so it is only imported on first
+    # access to keep `fz` startup fast for commands that do not render
+    if name in ("SchematicRenderer", "RenderedFile", "render_in_memory"):
+        from . import render
+
+        return getattr(render, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,147 @@
+import os
+from typing import Any, Callable, Dict, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from flaskerize.cache import TemplateCache
+    from flaskerize.fileio import StagedFileSystem
+    from flaskerize.lockfile import RenderLock
+    from flaskerize.statcache import StatCache
+    from flaskerize.render import SchematicRenderer
+
+
+def load_batch_plan(filename: str) -> List[Dict[str, Any]]:
+    """
+    Load a batch plan from a JSON file. The plan is a list of jobs, each of the
+    form {"schematic": ..., "name": ..., "args": [...]}, optionally wrapped as
+    {"jobs": [...]}.
+    """
+
+    import json
+
+    with open(filename, "r") as fid:
+        plan = json.load(fid)
+    if isinstance(plan, dict):
+        plan = plan.get("jobs", [])
+    if not isinstance(plan, list):
+        raise ValueError(f"Batch plan '{filename}' must contain a list of jobs")
+    return plan
+
+
+def _check_job(job: Dict[str, Any], index: int) -> None:
+    for key in ("schematic", "name"):
+        if key not in job:
+            raise ValueError(f"Batch job {index} is missing required key '{key}'")
+    if not isinstance(job.get("args", []), list):
+        raise ValueError(f"Batch job {index} 'args' must be a list")
+
+
+def render_batch(
+    jobs: List[Dict[str, Any]],
+    src_path: str = ".",
+    dry_run: bool = False,
+    template_cache: Optional["TemplateCache"] = None,
+    workers: int = 1,
+    resolve_schematic: Optional[Callable[[str], str]] = None,
+    lock: Optional["RenderLock"] = None,
+    spill_threshold: Optional[int] = None,
+    quiet: bool = False,
+    show_diffs: bool = False,
+    stat_cache: Optional["StatCache"] = None,
+) -> "StagedFileSystem":
+    """
+    Render several schematics in one process and commit them together.
+
+    Renderers, and with them loaded schemas, argument parsers, custom functions and
+    compiled templates, are reused by every job targeting the same schematic. All
+    jobs stage into a single StagedFileSystem that is diffed and committed once.
+
+    Args:
+        jobs (List[Dict[str, Any]]): jobs of the form {"schematic": ..., "name": ...,
+            "args": [...]}, where schematic and name are as for `fz generate`
+        src_path (str, optional): directory from which to base schematic
+            operations. Defaults to ".".
+        dry_run (bool, optional): don't actually write any files. Defaults to False.
+        template_cache (TemplateCache, optional): cache of compiled templates
+        workers (int, optional): worker threads used per render and to diff and
+            commit the staged files. Defaults to 1.
+        resolve_schematic (Callable[[str], str], optional): maps a schematic name
+            to its path. Defaults to the resolution used by `fz generate`.
+        lock (RenderLock, optional): lockfile shared by all jobs, used to skip
+            outputs whose inputs have not changed
+        spill_threshold (int, optional): staged bytes above which staging moves
+            from memory to disk. Defaults to None, which always stages in memory.
+        quiet (bool, optional): don't print a summary. Defaults to False.
+        show_diffs (bool, optional): print a unified diff of each modified file in
+            the summary. Defaults to False.
+        stat_cache (StatCache, optional): persistent cache of the digests of files
+            in src_path, used to diff without rereading unchanged files
+
+    Returns:
+        StagedFileSystem: the staging area into which all jobs were rendered, to be
+            closed by the caller once it is no longer needed
+    """
+
+    from flaskerize.fileio import StagedFileSystem
+    from flaskerize.render import SchematicRenderer
+
+    if resolve_schematic is None:
+        from flaskerize.parser import Flaskerize
+
+        resolve_schematic = Flaskerize()._check_get_schematic_path_from_name
+
+    for index, job in enumerate(jobs):
+        _check_job(job, index)
+
+    staged_fs = StagedFileSystem(
+        src_path=src_path,
+        dry_run=dry_run,
+        spill_threshold=spill_threshold,
+        workers=workers,
+        show_diffs=show_diffs,
+        stat_cache=stat_cache,
+    )
+    renderers: Dict[str, SchematicRenderer] = {}
+    try:
+        for job in jobs:
+            schematic_path = resolve_schematic(job["schematic"])
+            render_dirname, name = os.path.split(job["name"])
+            renderer = renderers.get(schematic_path)
+            if renderer is None:
+                renderer = SchematicRenderer(
+                    schematic_path,
+                    src_path=src_path,
+                    output_prefix=render_dirname,
+                    dry_run=dry_run,
+                    template_cache=template_cache,
+                    jobs=workers,
+                    staged_fs=staged_fs,
+                    quiet=True,
+                    lock=lock,
+                )
+                renderers[schematic_path] = renderer
+            else:
+                renderer.set_output_prefix(render_dirname)
+            renderer.render(name, job.get("args", []), commit=False)
+
+        if not quiet:
+            _print_batch_summary(staged_fs, jobs)
+        staged_fs.commit()
+    except BaseException:
+        # Release the staging area, which may have spilled to disk
+        staged_fs.close()
+        raise
+    return staged_fs
+
+
+def _print_batch_summary(staged_fs: "StagedFileSystem", jobs: List[Dict]) -> None:
+    from termcolor import colored
+
+    print(
+        f"""
+Flaskerize batch summary:
+
+        {colored("Batch generation successful!", "green")}
+        Jobs rendered: {colored(str(len(jobs)), "yellow")}
+        """
+    )
+    staged_fs.print_fs_diff()
@@ -0,0 +1,96 @@
+import json
+from os import path
+from unittest.mock import patch
+
+import pytest
+
+from .batch import load_batch_plan, render_batch
+from .fileio import StagedFileSystem
+from .parser import Flaskerize, FzArgumentParser
+
+
+def test_render_batch_renders_all_jobs(schematic_path, tmp_path):
+    src_path = path.join(tmp_path, "results")
+    jobs = [
+        {"schematic": schematic_path, "name": "a/one", "args": ["hello"]},
+        {"schematic": schematic_path, "name": "b/two", "args": ["hi"]},
+        {"schematic": schematic_path, "name": "three", "args": ["hey"]},
+    ]
+
+    render_batch(jobs, src_path=src_path, resolve_schematic=lambda s: s)
+
+    for filename, expected in [
+        ("a/one.txt", "hello one!"),
+        ("b/two.txt", "hi two!"),
+        ("three.txt", "hey three!"),
+    ]:
+        with open(path.join(src_path, filename)) as fid:
+            assert fid.read() == expected
+
+
+def test_render_batch_commits_once_and_reuses_renderers(schematic_path, tmp_path):
+    jobs = [
+        {"schematic": schematic_path, "name": f"out/{i}", "args": ["hi"]}
+        for i in range(5)
+    ]
+
+    with patch.object(StagedFileSystem, "commit") as mock_commit, patch(
+        "flaskerize.render.FzArgumentParser", wraps=FzArgumentParser
+    ) as mock_parser:
+        render_batch(jobs, src_path=str(tmp_path), resolve_schematic=lambda s: s)
+
+    mock_commit.assert_called_once()
+    mock_parser.assert_called_once()
+
+
+def test_render_batch_raises_on_invalid_job(schematic_path, tmp_path):
+    with pytest.raises(ValueError):
+        render_batch([{"name": "missing_schematic"}], src_path=str(tmp_path))
+
+
+def test_load_batch_plan_accepts_jobs_key(tmp_path):
+    filename = path.join(tmp_path, "plan.json")
+    with open(filename, "w") as fid:
+        json.dump({"jobs": [{"schematic": "entity", "name": "x"}]}, fid)
+
+    assert load_batch_plan(filename) == [{"schematic": "entity", "name": "x"}]
+
+
+def test_generate_batch_from_cli(schematic_path, tmp_path):
+    plan = path.join(tmp_path, "plan.json")
+    schematic = f"{path.dirname(schematic_path)}:doodad"
+    with open(plan, "w") as fid:
+        json.dump(
+            [
+                {"schematic": schematic, "name": "app/widget", "args": ["hi"]},
+                {"schematic": schematic, "name": "app/gadget", "args": ["hey"]},
+            ],
+            fid,
+        )
+
+    Flaskerize(["fz", "generate", "--batch", plan, "--from-dir", str(tmp_path)])
+
+    assert path.isfile(path.join(tmp_path, "app/widget.txt"))
+    assert path.isfile(path.join(tmp_path, "app/gadget.txt"))
+
+
+def test_batch_cli_prints_json_report(schematic_path, tmp_path, capsys):
+    plan = path.join(tmp_path, "plan.json")
+    with open(plan, "w") as fid:
+        json.dump([{"schematic": schematic_path, "name": "one", "args": ["hi"]}], fid)
+
+    Flaskerize(
+        [
+            "fz",
+            "generate",
+            "--batch",
+            plan,
+            "--from-dir",
+            str(tmp_path / "results"),
+            "--report",
+            "json",
+        ]
+    )
+
+    report = json.loads(capsys.readouterr().out)
+    assert report["created_files"] == [{"path": "one.txt", "bytes": len("hi one!")}]
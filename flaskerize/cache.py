@@ -0,0 +1,138 @@
+import os
+import threading
+from collections import OrderedDict
+from types import CodeType
+from typing import Optional
+
+from jinja2 import Environment, FileSystemBytecodeCache, Template
+from jinja2.bccache import Bucket
+
+from flaskerize.utils import default_cache_dir
+
+# Upper bound on the size of the on-disk compiled template cache, in bytes
+DEFAULT_MAX_CACHE_SIZE = 64 * 1024 * 1024
+
+# Upper bound on the number of compiled templates kept in memory per process
+DEFAULT_MAX_MEMORY_ENTRIES = 1024
+
+
+class BoundedFileSystemBytecodeCache(FileSystemBytecodeCache):
+    """
+    A Jinja bytecode cache stored on disk that evicts the least recently used
+    entries once the total size of the cache exceeds `max_size` bytes
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_size: int = DEFAULT_MAX_CACHE_SIZE,
+        pattern: str = "__flaskerize_%s.cache",
+    ):
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(directory=directory, pattern=pattern)
+        self.max_size = max_size
+
+    def load_bytecode(self, bucket: Bucket) -> None:
+        super().load_bytecode(bucket)
+        if bucket.code is not None:
+            # Touch the entry so that eviction is least-recently-used
+            try:
+                os.utime(self._get_cache_filename(bucket))
+            except OSError:
+                pass
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        super().dump_bytecode(bucket)
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the oldest cache entries until the cache fits within max_size"""
+
+        from fnmatch import fnmatch
+
+        entries = []
+        for filename in os.listdir(self.directory):
+            if not fnmatch(filename, self.pattern % "*"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, filename))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, filename))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, filename in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except OSError:
+                pass
+            total_size -= size
+
+
+class TemplateCache:
+    """
+    Cache of compiled Jinja templates, keyed by the full path of the template
+    within its schematic plus a hash of the template contents. Compiled code is
+    kept in memory for the lifetime of the process and, if `directory` is
+    provided, persisted on disk so that later runs skip compilation entirely.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_size: int = DEFAULT_MAX_CACHE_SIZE,
+        max_memory_entries: int = DEFAULT_MAX_MEMORY_ENTRIES,
+    ):
+        self.directory = directory
+        self.bytecode_cache = (
+            BoundedFileSystemBytecodeCache(directory, max_size=max_size)
+            if directory
+            else None
+        )
+        self.max_memory_entries = max_memory_entries
+        self._code: "OrderedDict[tuple, CodeType]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_code(
+        self, env: Environment, source: str, name: str, filename: str
+    ) -> CodeType:
+        """Get the compiled code for a template, compiling only on a cache miss"""
+
+        from hashlib import sha1
+
+        key = (filename, sha1(source.encode("utf-8")).hexdigest())
+        with self._lock:
+            code = self._code.get(key)
+            if code is not None:
+                self._code.move_to_end(key)
+                return code
+
+        if self.bytecode_cache is not None:
+            bucket = self.bytecode_cache.get_bucket(env, name, filename, source)
+            code = bucket.code
+            if code is None:
+                code = env.compile(source, name, filename)
+                bucket.code = code
+                self.bytecode_cache.set_bucket(bucket)
+        else:
+            code = env.compile(source, name, filename)
+
+        with self._lock:
+            self._code[key] = code
+            while len(self._code) > self.max_memory_entries:
+                self._code.popitem(last=False)
+        return code
+
+    def get_template(
+        self, env: Environment, source: str, name: str, filename: str
+    ) -> Template:
+        """Get a template bound to `env` for the provided source"""
+
+        code = self.get_code(env, source, name=name, filename=filename)
+        return env.template_class.from_code(env, code, env.make_globals(None), None)
+
+
+# Process-wide in-memory cache used when no explicit cache is provided
+default_template_cache = TemplateCache()
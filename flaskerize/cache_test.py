@@ -0,0 +1,77 @@
+import os
+from unittest.mock import patch
+
+from jinja2 import Environment
+
+from .cache import BoundedFileSystemBytecodeCache, TemplateCache, default_cache_dir
+
+
+def test_default_cache_dir_respects_env_var(tmp_path):
+    with patch.dict(os.environ, {"FLASKERIZE_CACHE_DIR": str(tmp_path)}):
+        result = default_cache_dir("templates")
+
+    assert result == os.path.join(str(tmp_path), "templates")
+
+
+def test_get_template_renders(tmp_path):
+    cache = TemplateCache(directory=str(tmp_path))
+    env = Environment()
+
+    tpl = cache.get_template(
+        env, "Hello {{ name }}!", name="a.template", filename="/sch/a.template"
+    )
+
+    assert tpl.render(name="there") == "Hello there!"
+
+
+def test_get_template_only_compiles_once_in_memory():
+    cache = TemplateCache()
+    env = Environment()
+    with patch.object(env, "compile", wraps=env.compile) as mock:
+        cache.get_template(env, "{{ x }}", name="a", filename="/sch/a")
+        cache.get_template(env, "{{ x }}", name="a", filename="/sch/a")
+
+    assert mock.call_count == 1
+
+
+def test_get_template_recompiles_when_contents_change():
+    cache = TemplateCache()
+    env = Environment()
+
+    first = cache.get_template(env, "{{ x }}", name="a", filename="/sch/a")
+    second = cache.get_template(env, "{{ x }}!", name="a", filename="/sch/a")
+
+    assert first.render(x=1) == "1"
+    assert second.render(x=1) == "1!"
+
+
+def test_get_template_reuses_code_from_disk_across_instances(tmp_path):
+    env = Environment()
+    TemplateCache(directory=str(tmp_path)).get_template(
+        env, "{{ x }}", name="a", filename="/sch/a"
+    )
+
+    cache = TemplateCache(directory=str(tmp_path))
+    with patch.object(env, "compile") as mock:
+        tpl = cache.get_template(env, "{{ x }}", name="a", filename="/sch/a")
+
+    mock.assert_not_called()
+    assert tpl.render(x=42) == "42"
+
+
+def test_bytecode_cache_evicts_oldest_entries(tmp_path):
+    cache = TemplateCache(directory=str(tmp_path), max_size=1)
+    env = Environment()
+
+    cache.get_template(env, "{{ a }}", name="a", filename="/sch/a")
+    cache.get_template(env, "{{ b }}", name="b", filename="/sch/b")
+
+    assert len(os.listdir(str(tmp_path))) <= 1
+
+
+def test_bytecode_cache_creates_directory(tmp_path):
+    directory = os.path.join(str(tmp_path), "does/not/exist")
+
+    BoundedFileSystemBytecodeCache(directory)
+
+    assert os.path.isdir(directory)
@@ -1,4 +1,5 @@
-from typing import List, Callable, Any
+import threading
+from typing import Any, Callable, Dict, List, Tuple
 
 
 def make_register_custom_function() -> Callable:
@@ -14,3 +15,38 @@ def make_register_custom_function() -> Callable:
 
 register_custom_function = make_register_custom_function()
 registered_funcs = register_custom_function.funcs
+
+# Custom functions registered by each schematic's custom_functions.py, keyed by
+# module path. Each entry also holds the (path, mtime, size) key it was loaded with
+# so that a module is only executed again once it changes on disk.
+_schematic_registries: Dict[str, Tuple[Tuple, List[Callable]]] = {}
+_registry_lock = threading.RLock()
+
+
+def load_schematic_custom_functions(
+    key: Tuple[str, Any, Any], execute: Callable[[], Any]
+) -> List[Callable]:
+    """
+    Get the custom functions registered by a schematic's custom_functions.py.
+
+    The module is executed through `execute` only if it has not been loaded before
+    with the same `key`, typically (path, mtime, size). Functions it registers are
+    removed from the process-global `registered_funcs` again so that they are only
+    bound to the environment of the schematic that defines them and do not
+    accumulate in long-lived processes.
+    """
+
+    path = key[0]
+    with _registry_lock:
+        cached = _schematic_registries.get(path)
+        if cached is not None and cached[0] == key:
+            return list(cached[1])
+
+        start = len(registered_funcs)
+        try:
+            execute()
+            funcs = registered_funcs[start:]
+        finally:
+            del registered_funcs[start:]
+        _schematic_registries[path] = (key, funcs)
+        return list(funcs)
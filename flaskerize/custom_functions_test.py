@@ -12,3 +12,56 @@ def test_register_custom_function():
     assert len(registered_funcs) == 1
     assert registered_funcs[0]() == f2()
     assert registered_funcs[0]() != f1()
+
+
+def _make_schematic(tmp_path, name: str, func_name: str) -> str:
+    import os
+
+    schematic_path = os.path.join(tmp_path, "schematics", name)
+    os.makedirs(os.path.join(schematic_path, "files"))
+    with open(os.path.join(schematic_path, "custom_functions.py"), "w") as fid:
+        fid.write(
+            "from flaskerize import register_custom_function\n\n\n"
+            "@register_custom_function\n"
+            f"def {func_name}(val):\n"
+            "    return val\n"
+        )
+    return schematic_path
+
+
+def test_schematic_custom_functions_are_scoped_to_their_schematic(tmp_path):
+    from flaskerize.render import SchematicRenderer
+
+    num_registered = len(registered_funcs)
+    first = SchematicRenderer(_make_schematic(tmp_path, "first", "first_func"))
+    second = SchematicRenderer(_make_schematic(tmp_path, "second", "second_func"))
+    first.render("a", [], commit=False)
+    second.render("b", [], commit=False)
+
+    assert "first_func" in first.env.globals
+    assert "second_func" not in first.env.globals
+    assert "second_func" in second.env.globals
+    assert "first_func" not in second.env.globals
+    assert len(registered_funcs) == num_registered
+
+
+def test_schematic_custom_functions_are_executed_once(tmp_path):
+    import os
+    from unittest.mock import patch
+    from flaskerize.render import SchematicRenderer
+
+    schematic_path = _make_schematic(tmp_path, "cached", "cached_func")
+    with patch.object(
+        SchematicRenderer,
+        "_exec_module",
+        autospec=True,
+        side_effect=SchematicRenderer._exec_module,
+    ) as mock:
+        for _ in range(3):
+            renderer = SchematicRenderer(schematic_path)
+            renderer._load_custom_functions(
+                os.path.join(schematic_path, "custom_functions.py")
+            )
+
+    assert mock.call_count == 1
+    assert "cached_func" in renderer.env.globals
@@ -0,0 +1,260 @@
+import os
+import sys
+import threading
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# Packages advertise schematics with an entry point in this group, whose name is the
+# package prefix used on the command line and whose value is the importable package
+# containing the schematics/ directory, e.g. `my_package = my_package`
+ENTRY_POINT_GROUP = "flaskerize.schematics"
+
+INDEX_VERSION = 1
+
+
+class SchematicInfo(NamedTuple):
+    """An installed schematic, as a directory, a pack, or both"""
+
+    package: str
+    name: str
+    path: Optional[str]
+    pack_path: Optional[str]
+
+    @property
+    def qualified_name(self) -> str:
+        return f"{self.package}:{self.name}"
+
+    def get_path(self, allow_pack: bool = True) -> Optional[str]:
+        """
+        Get the path to render from, preferring a pack when one is allowed and it
+        is not out of date with the schematic directory
+        """
+
+        if allow_pack and self.pack_path:
+            if self.path is None:
+                return self.pack_path
+            from flaskerize.pack import choose_pack_or_directory
+
+            return choose_pack_or_directory(self.pack_path, self.path)
+        return self.path
+
+
+def _iter_entry_points(group: str) -> Iterator[Tuple[str, str]]:
+    """Yield the (name, value) of each installed entry point in a group"""
+
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python < 3.8
+        import pkg_resources
+
+        for ep in pkg_resources.iter_entry_points(group):
+            yield ep.name, ep.module_name
+        return
+
+    eps: Any = entry_points()
+    if hasattr(eps, "select"):
+        selected = eps.select(group=group)
+    else:
+        selected = eps.get(group, [])
+    for ep in selected:
+        yield ep.name, ep.value
+
+
+def _locate_package_dir(module: str) -> Optional[str]:
+    """Locate a package's directory without importing it"""
+
+    from importlib.util import find_spec
+
+    parts = module.split(":")[0].strip().split(".")
+    spec = find_spec(parts[0])
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    return os.path.join(list(spec.submodule_search_locations)[0], *parts[1:])
+
+
+def _scan_package(package: str, pkg_dir: str) -> List[SchematicInfo]:
+    from flaskerize.pack import PACK_EXTENSION
+
+    schematics_dir = os.path.join(pkg_dir, "schematics")
+    try:
+        entries = os.listdir(schematics_dir)
+    except OSError:
+        return []
+    found: Dict[str, Dict[str, Optional[str]]] = {}
+    for entry in entries:
+        entry_path = os.path.join(schematics_dir, entry)
+        if entry.startswith((".", "_")):
+            continue
+        if entry.endswith(PACK_EXTENSION) and os.path.isfile(entry_path):
+            name = entry[: -len(PACK_EXTENSION)]
+            found.setdefault(name, {"path": None, "pack_path": None})
+            found[name]["pack_path"] = entry_path
+        elif os.path.isdir(entry_path):
+            found.setdefault(entry, {"path": None, "pack_path": None})
+            found[entry]["path"] = entry_path
+    return [
+        SchematicInfo(package=package, name=name, **paths)
+        for name, paths in sorted(found.items())
+    ]
+
+
+def _get_environment_stamp() -> List[Tuple[str, int]]:
+    """
+    Stamp of the import path, which changes whenever packages are installed or
+    removed, as doing so adds or removes entries in site-packages
+    """
+
+    stamp = []
+    cwd = os.getcwd()
+    for entry in sys.path:
+        if not entry or os.path.abspath(entry) == cwd:
+            # The working directory changes as files are generated into it
+            continue
+        try:
+            stamp.append((entry, os.stat(entry).st_mtime_ns))
+        except OSError:
+            continue
+    return stamp
+
+
+def _get_dirs_stamp(dirnames: List[str]) -> List[Tuple[str, int]]:
+    stamp = []
+    for dirname in dirnames:
+        try:
+            stamp.append((dirname, os.stat(dirname).st_mtime_ns))
+        except OSError:
+            stamp.append((dirname, -1))
+    return stamp
+
+
+def get_index_filename() -> str:
+    """
+    Name of the index file for the running environment. Each virtualenv and
+    interpreter has its own index, so that alternating between them does not
+    rebuild and overwrite a shared one.
+    """
+
+    import hashlib
+
+    key = hashlib.sha1(
+        "\0".join([sys.prefix, sys.executable, sys.version]).encode("utf-8")
+    ).hexdigest()[:16]
+    return f"schematic-index-{key}.json"
+
+
+class SchematicIndex:
+    """
+    Index of the schematics available across installed packages. Built from the
+    flaskerize.schematics entry-point group, plus the schematics that ship with
+    flaskerize itself, without importing any of the packages.
+
+    The index is cached on disk, per environment, and rebuilt whenever the import
+    path or any indexed schematics/ directory changes.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None):
+        from flaskerize.utils import default_cache_dir
+
+        self.cache_path = cache_path or default_cache_dir(get_index_filename())
+        self._data: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, data: Dict[str, Any], env_stamp: List) -> bool:
+        return (
+            data.get("version") == INDEX_VERSION
+            and data.get("environment") == env_stamp
+            and data.get("directories")
+            == _get_dirs_stamp([dirname for dirname, _ in data.get("directories", [])])
+        )
+
+    def _read_cache(self) -> Optional[Dict[str, Any]]:
+        import json
+
+        try:
+            with open(self.cache_path, "r") as fid:
+                data = json.load(fid)
+        except (OSError, ValueError):
+            return None
+        # JSON has no tuples; restore them so that stamps compare equal
+        for key in ("environment", "directories"):
+            data[key] = [tuple(item) for item in data.get(key, [])]
+        return data
+
+    def _write_cache(self, data: Dict[str, Any]) -> None:
+        import json
+        import tempfile
+
+        dirname = os.path.dirname(self.cache_path)
+        try:
+            os.makedirs(dirname, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".fz-", dir=dirname)
+            with os.fdopen(fd, "w") as fid:
+                json.dump(data, fid)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            # The index is only a cache; failing to persist it is not an error
+            pass
+
+    def _build(self, env_stamp: List) -> Dict[str, Any]:
+        packages = [("flaskerize", os.path.dirname(os.path.abspath(__file__)))]
+        for name, value in _iter_entry_points(ENTRY_POINT_GROUP):
+            if name == "flaskerize":
+                continue
+            pkg_dir = _locate_package_dir(value)
+            if pkg_dir is not None:
+                packages.append((name, pkg_dir))
+
+        schematics: List[SchematicInfo] = []
+        for package, pkg_dir in packages:
+            schematics.extend(_scan_package(package, pkg_dir))
+        return {
+            "version": INDEX_VERSION,
+            "environment": env_stamp,
+            "directories": _get_dirs_stamp(
+                [os.path.join(pkg_dir, "schematics") for _, pkg_dir in packages]
+            ),
+            "schematics": [info._asdict() for info in schematics],
+        }
+
+    def _load(self, refresh: bool = False) -> Dict[str, Any]:
+        env_stamp = _get_environment_stamp()
+        with self._lock:
+            if refresh:
+                self._data = None
+            if self._data is not None and self._is_fresh(self._data, env_stamp):
+                return self._data
+            data = None if refresh else self._read_cache()
+            if data is None or not self._is_fresh(data, env_stamp):
+                data = self._build(env_stamp)
+                self._write_cache(data)
+            self._data = data
+            return data
+
+    def refresh(self) -> None:
+        """Rebuild the index, ignoring any cached copy"""
+
+        self._load(refresh=True)
+
+    def list(self) -> List[SchematicInfo]:
+        """List every indexed schematic, ordered by package and then name"""
+
+        return [SchematicInfo(**info) for info in self._load()["schematics"]]
+
+    def get(self, package: str, name: str) -> Optional[SchematicInfo]:
+        """Look up a schematic by package and name, if it is indexed"""
+
+        for info in self.list():
+            if info.package == package and info.name == name:
+                return info
+        return None
+
+
+_default_index: Optional[SchematicIndex] = None
+
+
+def get_default_index() -> SchematicIndex:
+    """Get the index shared by this process"""
+
+    global _default_index
+    if _default_index is None:
+        _default_index = SchematicIndex()
+    return _default_index
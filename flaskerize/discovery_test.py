@@ -0,0 +1,139 @@
+import os
+import sys
+from os import path
+from unittest.mock import patch
+
+import pytest
+
+from .discovery import SchematicIndex
+
+
+@pytest.fixture
+def fake_package(tmp_path):
+    pkg_dir = path.join(tmp_path, "site", "fake_schematics_pkg")
+    os.makedirs(path.join(pkg_dir, "schematics", "widget", "files"))
+    with open(path.join(pkg_dir, "__init__.py"), "w") as fid:
+        fid.write("raise RuntimeError('packages must not be imported')\n")
+    with open(path.join(pkg_dir, "schematics", "gadget.fzpack"), "w") as fid:
+        fid.write("")
+
+    sys.path.insert(0, path.join(tmp_path, "site"))
+    entry_points = [("fake", "fake_schematics_pkg")]
+    with patch(
+        "flaskerize.discovery._iter_entry_points", return_value=entry_points
+    ) as mock:
+        yield pkg_dir, mock
+    sys.path.remove(path.join(tmp_path, "site"))
+
+
+def test_index_lists_builtin_and_entry_point_schematics(fake_package, tmp_path):
+    pkg_dir, _ = fake_package
+    index = SchematicIndex(cache_path=path.join(tmp_path, "index.json"))
+
+    names = [info.qualified_name for info in index.list()]
+
+    assert "flaskerize:entity" in names
+    assert "fake:widget" in names
+    gadget = index.get("fake", "gadget")
+    assert gadget.path is None
+    assert gadget.get_path() == path.join(pkg_dir, "schematics", "gadget.fzpack")
+    assert gadget.get_path(allow_pack=False) is None
+    assert "fake_schematics_pkg" not in sys.modules
+
+
+def test_index_is_reused_across_instances(fake_package, tmp_path):
+    _, mock = fake_package
+    cache_path = path.join(tmp_path, "index.json")
+    SchematicIndex(cache_path=cache_path).list()
+
+    with patch.object(SchematicIndex, "_build") as mock_build:
+        assert SchematicIndex(cache_path=cache_path).get("fake", "widget")
+
+    mock_build.assert_not_called()
+
+
+def test_index_is_rebuilt_when_schematics_change(fake_package, tmp_path):
+    pkg_dir, _ = fake_package
+    cache_path = path.join(tmp_path, "index.json")
+    assert SchematicIndex(cache_path=cache_path).get("fake", "doohickey") is None
+
+    os.makedirs(path.join(pkg_dir, "schematics", "doohickey"))
+    os.utime(path.join(pkg_dir, "schematics"), ns=(0, 0))
+
+    assert SchematicIndex(cache_path=cache_path).get("fake", "doohickey")
+
+
+def test_resolution_uses_index(fake_package, tmp_path):
+    from .parser import Flaskerize
+
+    pkg_dir, _ = fake_package
+    index = SchematicIndex(cache_path=path.join(tmp_path, "index.json"))
+    index.list()
+
+    with patch("flaskerize.discovery.get_default_index", return_value=index), patch(
+        "importlib.util.find_spec"
+    ) as mock_find_spec:
+        result = Flaskerize()._check_get_schematic_path_from_name("fake:widget")
+
+    assert result == path.join(pkg_dir, "schematics", "widget")
+    mock_find_spec.assert_not_called()
+
+
+def test_fz_list(fake_package, tmp_path, capsys):
+    from .parser import Flaskerize
+
+    index = SchematicIndex(cache_path=path.join(tmp_path, "index.json"))
+    with patch("flaskerize.discovery.get_default_index", return_value=index):
+        Flaskerize(["fz", "list"])
+
+    out = capsys.readouterr().out
+    assert "fake:widget" in out
+    assert "\nentity " in out
+
+
+def test_resolution_checks_stale_pack_once(fake_package, tmp_path, capsys):
+    from .parser import Flaskerize
+
+    pkg_dir, _ = fake_package
+    pack_path = path.join(pkg_dir, "schematics", "widget.fzpack")
+    with open(pack_path, "w") as fid:
+        fid.write("")
+    index = SchematicIndex(cache_path=path.join(tmp_path, "index.json"))
+
+    with patch("flaskerize.discovery.get_default_index", return_value=index), patch(
+        "flaskerize.pack.get_source_stamp", side_effect=lambda p: "stamp"
+    ) as mock_stamp:
+        result = Flaskerize()._check_get_schematic_path_from_name("fake:widget")
+
+    assert result == path.join(pkg_dir, "schematics", "widget")
+    assert mock_stamp.call_count == 1
+    assert capsys.readouterr().err.count("out of date") == 1
+
+
+def test_fz_list_does_not_check_packs(fake_package, tmp_path, capsys):
+    from .parser import Flaskerize
+
+    pkg_dir, _ = fake_package
+    with open(path.join(pkg_dir, "schematics", "widget.fzpack"), "w") as fid:
+        fid.write("")
+    index = SchematicIndex(cache_path=path.join(tmp_path, "index.json"))
+
+    with patch("flaskerize.discovery.get_default_index", return_value=index), patch(
+        "flaskerize.pack.choose_pack_or_directory"
+    ) as mock_choose:
+        Flaskerize(["fz", "list"])
+
+    mock_choose.assert_not_called()
+    out, err = capsys.readouterr()
+    assert path.join(pkg_dir, "schematics", "widget") in out
+    assert path.join(pkg_dir, "schematics", "gadget.fzpack") in out
+    assert err == ""
+
+
+def test_default_index_is_kept_per_environment(monkeypatch):
+    default_path = SchematicIndex().cache_path
+
+    monkeypatch.setattr(sys, "prefix", "/some/other/venv")
+
+    assert SchematicIndex().cache_path != default_path
+    assert path.dirname(SchematicIndex().cache_path) == path.dirname(default_path)
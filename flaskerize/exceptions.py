@@ -1,2 +1,6 @@
 class InvalidSchema(Exception):
     pass
+
+
+class DaemonAlreadyRunning(RuntimeError):
+    pass
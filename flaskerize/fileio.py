@@ -1,10 +1,23 @@
-from typing import Any, Callable, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
 import os
+import threading
+from contextlib import contextmanager
 import fs
+import fs.copy
+import fs.path
 from fs.base import FS
+from fs.wrapfs import WrapFS
 from _io import _IOBase
 from termcolor import colored
 
+from flaskerize.report import GenerationReport, PhaseTimer
+from flaskerize.statcache import StatCache, file_digest
+from flaskerize.utils import get_umask
+
+COPY_BUFFER_SIZE = 1024 * 1024
+# Modified files larger than this are not diffed by print_unified_diffs
+DIFF_SIZE_LIMIT = 1024 * 1024
+
 
 def default_fs_factory(path: str) -> FS:
     from fs import open_fs
@@ -12,6 +25,19 @@ def default_fs_factory(path: str) -> FS:
     return open_fs(path, create=True)
 
 
+class FsDiff(NamedTuple):
+    """
+    Classification of every staged path against the source file system. Paths are
+    relative to the root of the staging area.
+    """
+
+    created_directories: List[str]
+    created_files: List[str]
+    deleted_files: List[str]
+    modified_files: List[str]
+    unchanged_files: List[str]
+
+
 class StagedFileSystem:
     """
     A filesystem that writes to an in-memory staging area and only commits the
@@ -24,6 +50,10 @@ class StagedFileSystem:
         src_fs_factory: Callable[..., FS] = default_fs_factory,
         output_prefix: str = "",
         dry_run: bool = False,
+        spill_threshold: Optional[int] = None,
+        workers: int = 1,
+        show_diffs: bool = False,
+        stat_cache: Optional[StatCache] = None,
     ):
         """
         
@@ -32,9 +62,26 @@ class StagedFileSystem:
             src_fs_factory (Callable[..., FS], optional): Factory method for returning
 def default_fs_factory(path: str) -> FS:
                 PyFileSystem object. Defaults to default_fs_factory.
+            spill_threshold (int, optional): number of staged bytes above which the
+                staging area is moved from memory to a temporary directory within
+                src_path, or the system temporary directory for a dry run. Defaults
+                to None, which always stages in memory.
+            workers (int, optional): number of threads used to compare and commit
+                files. Defaults to 1.
+            show_diffs (bool, optional): include a unified diff of each modified file
+                in print_fs_diff. Defaults to False.
+            stat_cache (StatCache, optional): persistent cache of source file digests
+                keyed by stat data, used to compare files without reading unchanged
+                ones from the source. Defaults to None.
         """
         self.dry_run = dry_run
+        self.workers = workers
+        self.show_diffs = show_diffs
+        self.stat_cache = stat_cache
         self._deleted_files: List[str] = []
+        # Shared by scoped views; holds the last diff and the staging state it is of
+        self._diff_cache: Dict[str, Any] = {}
+        self.timer = PhaseTimer()
         self.src_path = src_path
         # self.src_fs = src_fs_factory(".")
 
@@ -43,38 +90,273 @@ def default_fs_factory(path: str) -> FS:
         self.src_fs = src_fs_factory(src_path or ".")
 
         # The stg_fs mirrors src_fs as an in-memory buffer of changes to be made
-        self.stg_fs = fs.open_fs(f"mem://")
+        if spill_threshold is None:
+            self.stg_fs = StagingFS(fs.open_fs("mem://"))
+        else:
+            self.stg_fs = SpillingFS(spill_threshold, spill_dir=self._get_spill_dir())
 
         # The render_fs is contained within stg_fs at the relative path `output_prefix`.
         # Rendering file system is from the frame-of-reference of the output_prefix
+        self._set_output_prefix(output_prefix)
+
+    def _get_spill_dir(self) -> Optional[str]:
+        # Spilling next to the destination keeps the commit a rename on one device,
+        # but a dry run must leave the destination untouched
+        from fs.errors import NoSysPath
+
+        if self.dry_run:
+            return None
+        try:
+            return self.src_fs.getsyspath("/")
+        except NoSysPath:
+            return None
+
+    def _set_output_prefix(self, output_prefix: str) -> None:
+        self.output_prefix = output_prefix
         if not self.stg_fs.isdir(output_prefix):
-            self.stg_fs.makedirs(output_prefix)
+            self.stg_fs.makedirs(output_prefix, recreate=True)
         self.render_fs = self.stg_fs.opendir(output_prefix)
 
+    def scoped(self, output_prefix: str) -> "StagedFileSystem":
+        """
+        Get a view of this staging area that renders relative to `output_prefix`.
+        The view shares the source and staging file systems, so that changes made
+        through any view are diffed and committed together.
+        """
+
+        from copy import copy
+
+        view = copy(self)
+        view._set_output_prefix(output_prefix)
+        return view
+
     def commit(self) -> None:
-        """Commit the in-memory staging file system to the destination"""
+        """
+        Commit the in-memory staging file system to the destination. Only created and
+        modified files are written, each to a temporary file that is then atomically
+        renamed into place, so unchanged files are never touched. Files staged on disk
+        after spilling are renamed into place directly.
+        """
+
+        if self.dry_run:
+            return
+        with self.timer.phase("commit"):
+            self._commit()
+
+    def _commit(self) -> None:
+        changes = self.diff()
+        sizes = self._diff_cache["sizes"]
+        for dirname in changes.created_directories:
+            self.src_fs.makedirs(dirname, recreate=True)
+
+        umask = get_umask()
+        synced_dirs = set(
+            self._map(
+                lambda path: self._commit_file(path, default_mode=0o666 & ~umask),
+                changes.created_files + changes.modified_files,
+            )
+        )
+        self._map(_fsync_dir, sorted(d for d in synced_dirs if d is not None))
+        if self.stat_cache is not None:
+            self.stat_cache.save()
+        self._diff_cache.clear()
+        # Keep what was committed so that it can still be reported afterwards
+        self._diff_cache["committed"] = (changes, sizes)
+
+    def report(self) -> GenerationReport:
+        """
+        Get a report of the changes committed, or for a dry run the changes that
+        would be committed, along with their sizes and per-phase timings
+        """
+
+        if "committed" in self._diff_cache:
+            changes, sizes = self._diff_cache["committed"]
+        else:
+            changes = self.diff()
+            sizes = self._diff_cache["sizes"]
+        sizes = dict(sizes)
+        for path in changes.deleted_files:
+            if self.src_fs.isfile(path):
+                sizes[path] = self.src_fs.getsize(path)
+        return GenerationReport(
+            diff=changes, sizes=sizes, timings=self.timer.timings, dry_run=self.dry_run
+        )
 
-        if not self.dry_run:
-            return fs.copy.copy_fs(self.stg_fs, self.src_fs)
+    def _commit_file(self, path: str, default_mode: int) -> Optional[str]:
+        # Digest the staged copy before it is written, as a spilled one is moved
+        digest = None
+        if self.stat_cache is not None:
+            digest = file_digest(lambda: self.stg_fs.openbin(path))
+        dirname = self._replace_file(path, default_mode)
+        if digest is not None:
+            self._record_source_digest(path, digest)
+        return dirname
+
+    def _replace_file(self, path: str, default_mode: int) -> Optional[str]:
+        """
+        Atomically write a staged file to the source file system, returning the system
+        directory that needs to be synced, if any.
+
+        Symlinks are written through to the file they point to, and the owner, group
+        and extended attributes of a replaced file are kept where permitted. Files
+        with other hard links are written in place instead, as replacing them would
+        split them from their other links.
+        """
+
+        import shutil
+        import tempfile
+        from fs.errors import NoSysPath
+
+        try:
+            syspath = self.src_fs.getsyspath(path)
+        except NoSysPath:
+            with self.stg_fs.openbin(path) as src:
+                self.src_fs.upload(path, src)
+            return None
+
+        syspath = os.path.realpath(syspath)
+        dirname = os.path.dirname(syspath)
+        stat = os.stat(syspath) if os.path.exists(syspath) else None
+        if stat is not None and stat.st_nlink > 1:
+            self._write_in_place(path, syspath)
+            return dirname
+        mode = default_mode if stat is None else stat.st_mode & 0o7777
+        if self._rename_staged_file(path, syspath, mode, stat):
+            return dirname
+        fd, tmp_path = tempfile.mkstemp(prefix=".fz-", dir=dirname)
+        try:
+            with os.fdopen(fd, "wb") as dst, self.stg_fs.openbin(path) as src:
+                shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.chmod(tmp_path, mode)
+            if stat is not None:
+                _copy_ownership(syspath, stat, tmp_path)
+            os.replace(tmp_path, syspath)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return dirname
+
+    def _write_in_place(self, path: str, syspath: str) -> None:
+        import shutil
+
+        with open(syspath, "wb") as dst, self.stg_fs.openbin(path) as src:
+            shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+            dst.flush()
+            os.fsync(dst.fileno())
+
+    def _rename_staged_file(
+        self, path: str, syspath: str, mode: int, stat: Optional[os.stat_result]
+    ) -> bool:
+        """Move a staged file that lives on disk into place, if on the same device"""
+
+        import errno
+        from fs.errors import NoSysPath
+
+        try:
+            staged_syspath = self.stg_fs.getsyspath(path)
+        except NoSysPath:
+            return False
+        fd = os.open(staged_syspath, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.chmod(staged_syspath, mode)
+        if stat is not None:
+            _copy_ownership(syspath, stat, staged_syspath)
+        try:
+            os.replace(staged_syspath, syspath)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            return False
+        return True
+
+    def close(self) -> None:
+        """
+        Release the staging area, removing the temporary directory it was moved to
+        if it spilled to disk. Scoped views share, and so also release, it.
+        """
+
+        self.stg_fs.close()
+
+    def __enter__(self) -> "StagedFileSystem":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
 
     def makedirs(self, dirname: str):
         return self.render_fs.makedirs(dirname)
 
     def exists(self, name: str):
-        return self.render_fs.exists(name)
+        if self.render_fs.exists(name):
+            return True
+        src_path = self._get_source_path(name)
+        return not self._is_deleted(src_path) and self.src_fs.exists(src_path)
 
     def isdir(self, name: str):
-        return self.render_fs.isdir(name)
+        if self.render_fs.isdir(name):
+            return True
+        src_path = self._get_source_path(name)
+        return not self._is_deleted(src_path) and self.src_fs.isdir(src_path)
+
+    def _is_deleted(self, src_path: str) -> bool:
+        """Check if a source path has been staged for deletion"""
+
+        if not self._deleted_files:
+            return False
+        normalized = fs.path.abspath(fs.path.normpath(src_path))
+        return any(
+            fs.path.abspath(fs.path.normpath(path)) == normalized
+            for path in self._deleted_files
+        )
+
+    def _get_source_path(self, path: str) -> str:
+        """Get the source path corresponding to a path relative to the render_fs"""
+
+        return fs.path.join(self.output_prefix, path)
 
     def open(self, path: str, mode: str = "r") -> _IOBase:
         """
         Open a file in the staging file system, lazily copying it from the source file
         system if the file exists on the source but not yet in memory.
+
+        Only files that are actually opened are pulled from the source. Opening such a
+        file read-only reads it directly from the source without staging it, while
+        opening it to append or update first copies it into staging. Opening it to
+        write truncates it, so nothing is copied. Files staged for deletion are never
+        read from the source, and opening one to write recreates it.
         """
 
         dirname, pathname = os.path.split(path)
+        copy_from: Optional[str] = None
+        src_path = self._get_source_path(path)
+        deleted = self._is_deleted(src_path)
+        if (
+            not deleted
+            and not self.render_fs.isfile(path)
+            and "w" not in mode
+            and "x" not in mode
+            and self.src_fs.isfile(src_path)
+        ):
+            if "a" not in mode and "+" not in mode:
+                return self.src_fs.open(src_path, mode=mode)
+            copy_from = src_path
+        if deleted and any(c in mode for c in "wax+"):
+            normalized = fs.path.abspath(fs.path.normpath(src_path))
+            self._deleted_files[:] = [
+                p
+                for p in self._deleted_files
+                if fs.path.abspath(fs.path.normpath(p)) != normalized
+            ]
         if not self.render_fs.isdir(dirname):
-            self.render_fs.makedirs(dirname)
+            self.render_fs.makedirs(dirname, recreate=True)
+        if copy_from is not None:
+            fs.copy.copy_file(self.src_fs, copy_from, self.render_fs, path)
         return self.render_fs.open(path, mode=mode)
 
     def delete(self, path: str) -> None:
@@ -83,13 +365,92 @@ def default_fs_factory(path: str) -> FS:
         self.stg_fs.remove(path)
         self._deleted_files.append(path)
 
-    def get_created_directories(self) -> List[str]:
-        """Get a list of the directories that are staged for creation"""
+    def diff(self) -> FsDiff:
+        """
+        Classify every staged path against the source file system in a single pass.
+        Each candidate for modification is compared once, and the result is reused
+        until the staging area changes.
+        """
+
+        # Taken before diffing, so that a write made meanwhile invalidates the result
+        key = (self.stg_fs.changes, tuple(self._deleted_files))
+        if self._diff_cache.get("key") == key:
+            return self._diff_cache["diff"]
+        with self.timer.phase("diff"):
+            result, sizes = self._diff()
+        self._diff_cache.clear()
+        self._diff_cache["key"] = key
+        self._diff_cache["diff"] = result
+        self._diff_cache["sizes"] = sizes
+        return result
+
+    def _diff(self) -> Tuple[FsDiff, Dict[str, int]]:
+        staged_directories: List[str] = []
+        sizes: Dict[str, int] = {}
+        for path, info in self.stg_fs.walk.info(namespaces=["details"]):
+            if info.is_dir:
+                staged_directories.append(path)
+            else:
+                sizes[path] = info.size
+        created_directories = self._get_created_directories(staged_directories)
+        staged_files = sorted(sizes)
+        classified: Dict[str, List[str]] = {
+            "created": [],
+            "modified": [],
+            "unchanged": [],
+        }
+        for path, status in zip(
+            staged_files, self._map(self._classify_file, staged_files)
+        ):
+            classified[status].append(path)
+
+        changes = FsDiff(
+            created_directories=created_directories,
+            created_files=classified["created"],
+            deleted_files=list(self._deleted_files),
+            modified_files=classified["modified"],
+            unchanged_files=classified["unchanged"],
+        )
+        return changes, sizes
 
-        all_directories = {x[0] for x in self.stg_fs.walk()}
-        existing_directories = {x[0] for x in self.src_fs.walk()}
-        created_directories = sorted(list(all_directories - existing_directories))
-        return self.get_full_sys_path(created_directories)
+    def _classify_file(self, path: str) -> str:
+        if not self.src_fs.exists(path):
+            return "created"
+        return "unchanged" if self._check_hashes_equal(path) else "modified"
+
+    def _map(self, func: Callable[[str], Any], paths: List[str]) -> List[Any]:
+        """
+        Apply func to each path, on up to `workers` threads. Results are returned in
+        the order of paths, and the first error raised is propagated.
+        """
+
+        if self.workers <= 1 or len(paths) <= 1:
+            return [func(path) for path in paths]
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(paths))) as executor:
+            return list(executor.map(func, paths))
+
+    def _get_created_directories(self, staged_directories: List[str]) -> List[str]:
+        """
+        Check only the staged directories against the source file system, rather than
+        walking the whole source tree. Directories are visited parents first, so the
+        children of a created directory are known to be created without a lookup.
+        """
+
+        created: List[str] = []
+        created_set = set()
+        for path in sorted(staged_directories):
+            if fs.path.dirname(path) in created_set or not self.src_fs.isdir(path):
+                created.append(path)
+                created_set.add(path)
+        return created
+
+    def get_created_directories(self, changes: Optional[FsDiff] = None) -> List[str]:
+        """Get a list of the directories that are staged for creation, from `changes` if given"""
+
+        return self.get_full_sys_path((changes or self.diff()).created_directories)
 
     def get_rel_path_names(self, paths: List[str]) -> List[str]:
         import os
@@ -99,54 +460,76 @@ def default_fs_factory(path: str) -> FS:
     def get_full_sys_path(self, paths: List[str]) -> List[str]:
         return [self.src_fs.getsyspath(f) for f in paths]
 
-    def get_created_files(self) -> List[str]:
-        """Get a list of the files that are staged for creation"""
+    def get_created_files(self, changes: Optional[FsDiff] = None) -> List[str]:
+        """Get a list of the files that are staged for creation, from `changes` if given"""
 
-        staged_files = {f.path for f in self.stg_fs.glob("**/*") if f.info.is_file}
-        existing_files = {f for f in staged_files if self.src_fs.exists(f)}
-        created_files = sorted(list(staged_files - existing_files))
-        return self.get_rel_path_names(created_files)
+        return self.get_rel_path_names((changes or self.diff()).created_files)
 
-    def get_deleted_files(self) -> List[str]:
-        """Get a list of the files that are staged for deletion"""
+    def get_deleted_files(self, changes: Optional[FsDiff] = None) -> List[str]:
+        """Get a list of the files that are staged for deletion, from `changes` if given"""
 
-        return self.get_rel_path_names(self._deleted_files)
+        return self.get_rel_path_names((changes or self.diff()).deleted_files)
 
-    def get_modified_files(self) -> List[str]:
-        """Get a list of the files that are staged for modification"""
+    def get_modified_files(self, changes: Optional[FsDiff] = None) -> List[str]:
+        """Get a list of the files that are staged for modification, from `changes` if given"""
 
-        staged_files = {f.path for f in self.stg_fs.glob("**/*") if f.info.is_file}
-        existing_files = {f for f in staged_files if self.src_fs.exists(f)}
-        candidates_for_modification = staged_files & existing_files
-        modified_files = []
-        for filename in candidates_for_modification:
-            if not self._check_hashes_equal(filename):
-                modified_files.append(filename)
-        return self.get_rel_path_names(modified_files)
+        return self.get_rel_path_names((changes or self.diff()).modified_files)
 
-    def get_unchanged_files(self) -> List[str]:
-        """Get a list of the files that are unchanged"""
+    def get_unchanged_files(self, changes: Optional[FsDiff] = None) -> List[str]:
+        """Get a list of the files that are unchanged, from `changes` if given"""
 
-        staged_files = {f.path for f in self.stg_fs.glob("**/*") if f.info.is_file}
-        existing_files = {f for f in staged_files if self.src_fs.exists(f)}
-        candidates_for_modification = staged_files & existing_files
-        unchanged_files = []
-        for filename in candidates_for_modification:
-            if self._check_hashes_equal(filename):
-                unchanged_files.append(filename)
-        return self.get_rel_path_names(unchanged_files)
+        return self.get_rel_path_names((changes or self.diff()).unchanged_files)
 
     def _check_hashes_equal(self, src_file: str, dst_file: str = None):
-        left = md5(lambda: self.src_fs.open(src_file, "rb"))
-        right = md5(lambda: self.stg_fs.open(dst_file or src_file, "rb"))
-        return left == right
+        """
+        Check whether a source file and its staged counterpart have the same contents.
+        Files of differing size are rejected without being read. With a stat cache,
+        the staged file is compared against the cached digest of the source file;
+        otherwise the bytes are compared directly and the comparison stops at the
+        first difference.
+        """
+
+        dst_file = dst_file or src_file
+        if self.src_fs.getsize(src_file) != self.stg_fs.getsize(dst_file):
+            return False
+        stat = self._stat_source(src_file) if self.stat_cache is not None else None
+        if stat is not None:
+            return self._get_source_digest(src_file, stat) == file_digest(
+                lambda: self.stg_fs.openbin(dst_file)
+            )
+        return contents_equal(
+            lambda: self.src_fs.openbin(src_file), lambda: self.stg_fs.openbin(dst_file)
+        )
+
+    def _stat_source(self, path: str) -> Optional[os.stat_result]:
+        from fs.errors import NoSysPath
+
+        try:
+            return os.stat(self.src_fs.getsyspath(path))
+        except (NoSysPath, OSError):
+            return None
+
+    def _get_source_digest(self, path: str, stat: os.stat_result) -> str:
+        """Get the digest of a source file, reading it only if its stat data changed"""
+
+        digest = self.stat_cache.get(path, stat.st_size, stat.st_mtime_ns)
+        if digest is None:
+            digest = file_digest(lambda: self.src_fs.openbin(path))
+            self.stat_cache.set(path, stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+
+    def _record_source_digest(self, path: str, digest: str) -> None:
+        stat = self._stat_source(path)
+        if stat is not None:
+            self.stat_cache.set(path, stat.st_size, stat.st_mtime_ns, digest)
 
     def print_fs_diff(self):
-        created_dirs = self.get_created_directories()
-        created_files = self.get_created_files()
-        deleted_files = self.get_deleted_files()
-        modified_files = self.get_modified_files()
-        unchanged_files = self.get_unchanged_files()
+        changes = self.diff()
+        created_dirs = self.get_created_directories(changes)
+        created_files = self.get_created_files(changes)
+        deleted_files = self.get_deleted_files(changes)
+        modified_files = self.get_modified_files(changes)
+        unchanged_files = self.get_unchanged_files(changes)
 
         print(
             f"""
@@ -167,11 +550,63 @@ def default_fs_factory(path: str) -> FS:
             self._print_deleted(filename)
         for filename in modified_files:
             self._print_modified(filename)
+        if self.show_diffs:
+            self.print_unified_diffs()
         if self.dry_run:
             print(
                 f'\n{colored("Dry run (--dry-run) enabled. No files were actually written.", "yellow")}'
             )
 
+    def iter_unified_diffs(self, max_size: int = DIFF_SIZE_LIMIT) -> Iterator[str]:
+        """
+        Yield the lines of a unified diff of each modified file. Each file is read
+        whole from the source and staging file systems, as difflib needs every line
+        up front, but only one pair is held in memory at a time. Files larger than
+        max_size bytes, which bounds that memory, or that appear to be binary, are
+        reported by a single line rather than diffed.
+        """
+
+        for path in self.diff().modified_files:
+            yield from self._iter_unified_diff(path, max_size)
+
+    def _iter_unified_diff(self, path: str, max_size: int) -> Iterator[str]:
+        import difflib
+
+        name = fs.path.relpath(path)
+        if max(self.src_fs.getsize(path), self.stg_fs.getsize(path)) > max_size:
+            yield f"Diff of {name} skipped: larger than {max_size} bytes\n"
+            return
+        before = self.src_fs.readbytes(path)
+        after = self.stg_fs.readbytes(path)
+        before_lines = _decode_lines(before)
+        after_lines = _decode_lines(after)
+        if before_lines is None or after_lines is None:
+            yield f"Binary files a/{name} and b/{name} differ\n"
+            return
+        for line in difflib.unified_diff(
+            before_lines, after_lines, fromfile=f"a/{name}", tofile=f"b/{name}"
+        ):
+            if not line.endswith("\n"):
+                line += "\n\\ No newline at end of file\n"
+            yield line
+
+    def print_unified_diffs(self, max_size: int = DIFF_SIZE_LIMIT) -> None:
+        """Print a coloured unified diff of each modified file"""
+
+        import sys
+
+        print()
+        for line in self.iter_unified_diffs(max_size):
+            if line.startswith(("+++", "---")):
+                line = colored(line, attrs=["bold"])
+            elif line.startswith("+"):
+                line = colored(line, "green")
+            elif line.startswith("-"):
+                line = colored(line, "red")
+            elif line.startswith("@@"):
+                line = colored(line, "cyan")
+            sys.stdout.write(line)
+
     def _print_created(self, value: str) -> None:
 
         COLOR = "green"
@@ -191,6 +626,372 @@ def default_fs_factory(path: str) -> FS:
         print(f"{colored(BASE, COLOR)}: {value}")
 
 
+class StagingFS(WrapFS):
+    """
+    A staging file system that counts the changes made to it, so that a diff of
+    the staging area can be reused until it next changes without walking it.
+
+    Every write, whether through an open handle or a whole-file operation such as
+    upload or copy, is counted once when it starts and again when it finishes.
+    """
+
+    def __init__(self, wrap_fs: FS):
+        super().__init__(wrap_fs)
+        self.changes = 0
+        self._changes_lock = threading.Lock()
+
+    def _changed(self) -> None:
+        with self._changes_lock:
+            self.changes += 1
+
+    def open(self, path, mode="r", *args, **kwargs):
+        handle = super().open(path, mode, *args, **kwargs)
+        return self._track(path, mode, handle)
+
+    def openbin(self, path, mode="r", *args, **kwargs):
+        handle = super().openbin(path, mode, *args, **kwargs)
+        return self._track(path, mode, handle)
+
+    def _track(self, path: str, mode: str, handle: Any) -> Any:
+        if not any(c in mode for c in "wax+"):
+            return handle
+        self._changed()
+        return _ClosingFile(handle, self._changed)
+
+    def upload(self, path, file, chunk_size=None, **options):
+        with self._writing(path, size=_get_stream_size(file)):
+            super().upload(path, file, chunk_size=chunk_size, **options)
+
+    setbinfile = upload
+
+    def writebytes(self, path, contents):
+        with self._writing(path, size=len(contents)):
+            super().writebytes(path, contents)
+
+    setbytes = writebytes
+
+    def writefile(self, path, file, encoding=None, errors=None, newline=""):
+        with self._writing(path):
+            super().writefile(path, file, encoding, errors, newline)
+
+    setfile = writefile
+
+    def appendbytes(self, path, data):
+        with self._writing(path, size=len(data)):
+            super().appendbytes(path, data)
+
+    def appendtext(self, path, text, *args, **kwargs):
+        with self._writing(path):
+            super().appendtext(path, text, *args, **kwargs)
+
+    def create(self, path, wipe=False):
+        with self._writing(path):
+            return super().create(path, wipe=wipe)
+
+    def touch(self, path):
+        with self._writing(path):
+            super().touch(path)
+
+    def copy(self, src_path, dst_path, *args, **kwargs):
+        with self._writing(dst_path):
+            super().copy(src_path, dst_path, *args, **kwargs)
+
+    def move(self, src_path, dst_path, *args, **kwargs):
+        with self._writing(src_path, dst_path):
+            super().move(src_path, dst_path, *args, **kwargs)
+
+    def copydir(self, src_path, dst_path, *args, **kwargs):
+        with self._writing(dst_path, tree=True):
+            super().copydir(src_path, dst_path, *args, **kwargs)
+
+    def movedir(self, src_path, dst_path, *args, **kwargs):
+        with self._writing(src_path, dst_path, tree=True):
+            super().movedir(src_path, dst_path, *args, **kwargs)
+
+    def remove(self, path):
+        with self._writing(path):
+            super().remove(path)
+
+    def removetree(self, dir_path):
+        with self._writing(dir_path, tree=True):
+            super().removetree(dir_path)
+
+    def makedir(self, path, *args, **kwargs):
+        with self._writing(path):
+            return super().makedir(path, *args, **kwargs)
+
+    def makedirs(self, path, *args, **kwargs):
+        with self._writing(path):
+            return super().makedirs(path, *args, **kwargs)
+
+    def removedir(self, path):
+        with self._writing(path):
+            super().removedir(path)
+
+    @contextmanager
+    def _writing(
+        self, *paths: str, size: Optional[int] = None, tree: bool = False
+    ) -> Iterator[None]:
+        self._changed()
+        try:
+            yield
+        finally:
+            self._changed()
+
+
+class SpillingFS(StagingFS):
+    """
+    A staging file system that starts out in memory and moves its contents to a
+    temporary directory on disk once the staged files exceed a size threshold.
+    Views created with opendir keep working across the move, as they delegate to
+    this file system rather than to the backend it wraps.
+
+    Every write counted by StagingFS is also counted towards the threshold. The
+    move only happens while no write is in progress, so writes that overlap on
+    other threads delay it until they finish. Files written through open handles
+    are measured once closed, so a single file is held in memory in full before it
+    can trigger the move; uploads of a file whose size is known move the staging
+    area to disk beforehand.
+    """
+
+    def __init__(self, threshold: int, spill_dir: Optional[str] = None):
+        super().__init__(fs.open_fs("mem://"))
+        self.threshold = threshold
+        self.spill_dir = spill_dir
+        self.spilled = False
+        self.spill_path: Optional[str] = None
+        self._sizes: Dict[str, int] = {}
+        self._total_size = 0
+        self._open_writers = 0
+        self._spill_lock = threading.RLock()
+
+    def open(self, path, mode="r", *args, **kwargs):
+        with self._spill_lock:
+            return super().open(path, mode, *args, **kwargs)
+
+    def openbin(self, path, mode="r", *args, **kwargs):
+        with self._spill_lock:
+            return super().openbin(path, mode, *args, **kwargs)
+
+    def _track(self, path: str, mode: str, handle: Any) -> Any:
+        handle = super()._track(path, mode, handle)
+        if not any(c in mode for c in "wax+") or not self._begin_write():
+            return handle
+        return _ClosingFile(handle, lambda: self._end_write(path))
+
+    @contextmanager
+    def _writing(
+        self, *paths: str, size: Optional[int] = None, tree: bool = False
+    ) -> Iterator[None]:
+        with super()._writing(*paths, size=size, tree=tree):
+            tracked = self._begin_write(size)
+            try:
+                yield
+            finally:
+                if tracked:
+                    self._end_write(*paths, tree=tree)
+
+    def _begin_write(self, size: Optional[int] = None) -> bool:
+        """
+        Register a write about to start, moving to disk first if a write of a known
+        size would exceed the threshold. Returns whether the write is tracked.
+        """
+
+        with self._spill_lock:
+            if self.spilled:
+                return False
+            if (
+                size is not None
+                and self._open_writers == 0
+                and self._total_size + size > self.threshold
+            ):
+                self.spill()
+                return False
+            self._open_writers += 1
+            return True
+
+    def _end_write(self, *paths: str, tree: bool = False) -> None:
+        with self._spill_lock:
+            self._open_writers -= 1
+            if self.spilled:
+                return
+            for path in paths:
+                self._update_size(path, tree=tree)
+            # Moving while writes are in progress would lose them, so wait for them
+            if self._total_size > self.threshold and self._open_writers == 0:
+                self.spill()
+
+    def _update_size(self, path: str, tree: bool = False) -> None:
+        backend = self.delegate_fs()
+        path = fs.path.abspath(fs.path.normpath(path))
+        stale = [path]
+        if tree:
+            prefix = fs.path.forcedir(path)
+            stale.extend(p for p in self._sizes if p.startswith(prefix))
+        for stale_path in stale:
+            self._total_size -= self._sizes.pop(stale_path, 0)
+
+        sizes: List[Tuple[str, int]] = []
+        if backend.isfile(path):
+            sizes.append((path, backend.getsize(path)))
+        elif tree and backend.isdir(path):
+            sizes.extend(
+                (file_path, info.size)
+                for file_path, info in backend.walk.info(path, namespaces=["details"])
+                if not info.is_dir
+            )
+        for file_path, size in sizes:
+            self._sizes[file_path] = size
+            self._total_size += size
+
+    def spill(self) -> None:
+        """Move the staged contents to a temporary directory on disk"""
+
+        import shutil
+        import tempfile
+        import weakref
+        from fs.copy import copy_fs
+        from fs.osfs import OSFS
+
+        with self._spill_lock:
+            if self.spilled:
+                return
+            temp_path = tempfile.mkdtemp(prefix=".fz-staging-", dir=self.spill_dir)
+            # Removed by close; this is only a fallback should close not be called
+            weakref.finalize(self, shutil.rmtree, temp_path, ignore_errors=True)
+            disk_fs = OSFS(temp_path)
+            copy_fs(self.delegate_fs(), disk_fs)
+            # The in-memory backend is dropped rather than closed, so that handles
+            # still reading from it remain valid
+            self._wrap_fs = disk_fs
+            self.spill_path = temp_path
+            self.spilled = True
+
+    def close(self) -> None:
+        import shutil
+
+        super().close()
+        if self.spill_path is not None:
+            shutil.rmtree(self.spill_path, ignore_errors=True)
+            self.spill_path = None
+
+
+def _get_stream_size(file: Any) -> Optional[int]:
+    """Get the number of bytes remaining in a seekable stream, if it can be known"""
+
+    try:
+        position = file.tell()
+        end = file.seek(0, os.SEEK_END)
+        file.seek(position)
+    except (AttributeError, OSError, ValueError):
+        return None
+    return end - position
+
+
+class _ClosingFile:
+    """File proxy that invokes a callback once the underlying file is closed"""
+
+    def __init__(self, handle: Any, on_close: Callable[[], None]):
+        self._handle = handle
+        self._on_close = on_close
+        self._notified = False
+
+    def close(self) -> None:
+        self._handle.close()
+        if not self._notified:
+            self._notified = True
+            self._on_close()
+
+    def __enter__(self) -> "_ClosingFile":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def __iter__(self):
+        return iter(self._handle)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._handle, name)
+
+
+def _decode_lines(data: bytes) -> Optional[List[str]]:
+    """Split text into lines, or return None if the data appears to be binary"""
+
+    # Same heuristic as git: a NUL byte near the start means binary
+    if b"\0" in data[:8000]:
+        return None
+    try:
+        return data.decode("utf-8").splitlines(True)
+    except UnicodeDecodeError:
+        return None
+
+
+def _copy_ownership(src: str, stat: os.stat_result, dst: str) -> None:
+    """
+    Give dst the owner, group and extended attributes (including POSIX ACLs) of
+    src, as far as this process is permitted to
+    """
+
+    if hasattr(os, "chown"):
+        try:
+            os.chown(dst, stat.st_uid, stat.st_gid)
+        except OSError:
+            pass
+    if hasattr(os, "listxattr"):
+        try:
+            for name in os.listxattr(src):
+                os.setxattr(dst, name, os.getxattr(src, name))
+        except OSError:
+            pass
+
+
+def _fsync_dir(dirname: Optional[str]) -> None:
+    """Flush a directory entry to disk, where the platform supports it"""
+
+    if dirname is None or not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(dirname, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def contents_equal(
+    left_getter: Callable[[], Any],
+    right_getter: Callable[[], Any],
+    buffer_size: int = COPY_BUFFER_SIZE,
+) -> bool:
+    """Compare the contents of two binary file handles, chunk by chunk"""
+
+    with left_getter() as left, right_getter() as right:
+        while True:
+            left_chunk = _read_full(left, buffer_size)
+            right_chunk = _read_full(right, buffer_size)
+            if left_chunk != right_chunk:
+                return False
+            if not left_chunk:
+                return True
+
+
+def _read_full(handle: Any, size: int) -> bytes:
+    """Read up to size bytes, only returning fewer at the end of the file"""
+
+    chunk = handle.read(size)
+    if not chunk or len(chunk) == size:
+        return chunk
+    chunks = [chunk]
+    remaining = size - len(chunk)
+    while remaining:
+        chunk = handle.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
 def md5(fhandle_getter):
     import hashlib
 
@@ -150,3 +150,472 @@ def test_print_fs_diff_delete(fs):
     mock__print_deleted.assert_called_once_with("test_delete_file")
     mock__print_created.assert_not_called()
     mock__print_modified.assert_not_called()
+
+
+def test_scoped_shares_staging_area(fs):
+    view = fs.scoped("some/prefix")
+    with view.open("my_file.txt", "w") as fid:
+        fid.write("Some content")
+
+    assert fs.stg_fs.exists("some/prefix/my_file.txt")
+    assert view.render_fs.exists("my_file.txt")
+    assert fs.get_created_files() == view.get_created_files()
+
+
+def test_diff_classifies_staged_paths(fs):
+    fs.src_fs.writetext("modified.txt", "old")
+    fs.src_fs.writetext("unchanged.txt", "same")
+    fs.stg_fs.writetext("modified.txt", "new")
+    fs.stg_fs.writetext("unchanged.txt", "same")
+    with fs.open("new_dir/created.txt", "w") as fid:
+        fid.write("created")
+
+    result = fs.diff()
+
+    assert result.created_directories == ["/new_dir"]
+    assert result.created_files == ["/new_dir/created.txt"]
+    assert result.modified_files == ["/modified.txt"]
+    assert result.unchanged_files == ["/unchanged.txt"]
+    assert result.deleted_files == []
+
+
+def test_diff_compares_each_file_once(fs):
+    fs.src_fs.writetext("my_file.txt", "old")
+    fs.stg_fs.writetext("my_file.txt", "new")
+
+    with patch.object(
+        StagedFileSystem,
+        "_check_hashes_equal",
+        autospec=True,
+        side_effect=StagedFileSystem._check_hashes_equal,
+    ) as mock:
+        fs.print_fs_diff()
+
+    assert mock.call_count == 1
+
+
+def test_diff_is_recomputed_when_staging_changes(fs):
+    assert fs.diff().created_files == []
+
+    with fs.open("my_file.txt", "w") as fid:
+        fid.write("Some content")
+
+    assert fs.diff().created_files == ["/my_file.txt"]
+
+
+def test_diff_walks_staging_once_until_it_changes(fs):
+    fs.src_fs.writetext("my_file.txt", "old")
+    fs.stg_fs.writetext("my_file.txt", "new")
+
+    with patch.object(
+        StagedFileSystem, "_diff", autospec=True, side_effect=StagedFileSystem._diff
+    ) as mock:
+        fs.print_fs_diff()
+        fs.report()
+        fs.commit()
+
+    assert mock.call_count == 1
+
+
+def test_diff_is_recomputed_after_writes_through_views(fs):
+    assert fs.diff().created_directories == []
+
+    fs.render_fs.makedirs("new_dir")
+    assert fs.diff().created_directories == ["/new_dir"]
+
+    fs.render_fs.writebytes("new_dir/created.txt", b"created")
+    assert fs.diff().created_files == ["/new_dir/created.txt"]
+
+    fs.delete("new_dir/created.txt")
+    assert fs.diff().created_files == []
+    assert fs.diff().deleted_files == ["new_dir/created.txt"]
+
+
+def test_commit_does_not_touch_unchanged_files(fs):
+    import os
+
+    fs.src_fs.writetext("unchanged.txt", "same")
+    unchanged_path = fs.src_fs.getsyspath("unchanged.txt")
+    os.utime(unchanged_path, (0, 0))
+    fs.stg_fs.writetext("unchanged.txt", "same")
+
+    fs.commit()
+
+    assert os.stat(unchanged_path).st_mtime == 0
+
+
+def test_commit_replaces_modified_files_and_keeps_mode(fs):
+    import os
+
+    fs.src_fs.writetext("script.sh", "old")
+    script_path = fs.src_fs.getsyspath("script.sh")
+    os.chmod(script_path, 0o755)
+    fs.stg_fs.writetext("script.sh", "new")
+    with fs.open("new_dir/created.txt", "w") as fid:
+        fid.write("created")
+
+    fs.commit()
+
+    assert fs.src_fs.readtext("script.sh") == "new"
+    assert os.stat(script_path).st_mode & 0o777 == 0o755
+    assert fs.src_fs.readtext("new_dir/created.txt") == "created"
+    assert sorted(os.listdir(fs.src_path)) == ["new_dir", "script.sh"]
+
+
+def test_check_hashes_equal_skips_reading_files_of_different_size(fs):
+    fs.src_fs.writetext("my_file.txt", "old")
+    fs.stg_fs.writetext("my_file.txt", "longer")
+
+    with patch("flaskerize.fileio.contents_equal") as mock:
+        assert not fs._check_hashes_equal("my_file.txt")
+
+    mock.assert_not_called()
+
+
+def test_check_hashes_equal_compares_contents(fs):
+    fs.src_fs.writetext("same.txt", "abc")
+    fs.stg_fs.writetext("same.txt", "abc")
+    fs.src_fs.writetext("different.txt", "abc")
+    fs.stg_fs.writetext("different.txt", "abd")
+
+    assert fs._check_hashes_equal("same.txt")
+    assert not fs._check_hashes_equal("different.txt")
+
+
+def test_contents_equal_across_chunks(tmp_path):
+    from .fileio import contents_equal
+
+    left = path.join(tmp_path, "left.bin")
+    right = path.join(tmp_path, "right.bin")
+    with open(left, "wb") as fid:
+        fid.write(b"x" * 10 + b"y")
+    with open(right, "wb") as fid:
+        fid.write(b"x" * 10 + b"z")
+
+    assert contents_equal(lambda: open(left, "rb"), lambda: open(left, "rb"), 4)
+    assert not contents_equal(lambda: open(left, "rb"), lambda: open(right, "rb"), 4)
+
+
+def test_contents_equal_handles_short_reads():
+    import io
+
+    from .fileio import contents_equal
+
+    class ShortReads(io.RawIOBase):
+        """Returns at most three bytes per read, as a pipe or raw handle may"""
+
+        def __init__(self, data):
+            self._data = io.BytesIO(data)
+
+        def readable(self):
+            return True
+
+        def read(self, size=-1):
+            return self._data.read(min(size, 3) if size >= 0 else 3)
+
+    data = b"abcdefghijklmnop"
+
+    assert contents_equal(lambda: ShortReads(data), lambda: io.BytesIO(data), 8)
+    assert not contents_equal(
+        lambda: ShortReads(data), lambda: io.BytesIO(data[:-1] + b"!"), 8
+    )
+
+
+def test_created_directories_only_check_staged_directories(fs):
+    fs.src_fs.makedirs("existing")
+    fs.src_fs.makedirs("unrelated/tree")
+    with fs.open("existing/new/deeper/my_file.txt", "w") as fid:
+        fid.write("Some content")
+
+    with patch.object(fs.src_fs, "isdir", wraps=fs.src_fs.isdir) as mock:
+        result = fs.diff()
+
+    assert result.created_directories == ["/existing/new", "/existing/new/deeper"]
+    assert [c[0][0] for c in mock.call_args_list] == ["/existing", "/existing/new"]
+
+
+def test_spilling_staging_moves_to_disk_past_threshold(tmp_path):
+    staged = StagedFileSystem(src_path=str(tmp_path), spill_threshold=8)
+    view = staged.scoped("nested")
+    with view.open("small.txt", "w") as fid:
+        fid.write("tiny")
+    assert not staged.stg_fs.spilled
+
+    with view.open("large.txt", "w") as fid:
+        fid.write("x" * 16)
+
+    assert staged.stg_fs.spilled
+    assert staged.stg_fs.readtext("nested/small.txt") == "tiny"
+    assert view.render_fs.readtext("large.txt") == "x" * 16
+
+
+def test_spilled_staging_commits_by_rename(tmp_path):
+    staged = StagedFileSystem(src_path=str(tmp_path), spill_threshold=0)
+    with staged.open("dir/my_file.txt", "w") as fid:
+        fid.write("Some content")
+    assert staged.stg_fs.spilled
+
+    with patch("shutil.copyfileobj") as mock:
+        staged.commit()
+
+    mock.assert_not_called()
+    assert staged.src_fs.readtext("dir/my_file.txt") == "Some content"
+
+
+def test_spilling_counts_uploaded_static_files(tmp_path):
+    import fs.copy
+
+    staged = StagedFileSystem(src_path=str(tmp_path), spill_threshold=100)
+    schematic_fs = fs.open_fs("mem://")
+    schematic_fs.writebytes("asset.bin", b"\0" * 5000)
+
+    fs.copy.copy_file(schematic_fs, "asset.bin", staged.render_fs, "asset.bin")
+
+    assert staged.stg_fs.spilled
+    assert staged.stg_fs.readbytes("asset.bin") == b"\0" * 5000
+
+
+def test_spilling_tracks_concurrent_uploads(tmp_path):
+    import io
+    from concurrent.futures import ThreadPoolExecutor
+
+    staged = StagedFileSystem(src_path=str(tmp_path), spill_threshold=1000)
+
+    def upload(index):
+        staged.render_fs.upload(f"file{index}.bin", io.BytesIO(b"x" * 100))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(upload, range(50)))
+
+    assert staged.stg_fs.spilled
+    assert sorted(staged.stg_fs.listdir("/")) == sorted(
+        f"file{i}.bin" for i in range(50)
+    )
+    assert all(staged.stg_fs.getsize(f"file{i}.bin") == 100 for i in range(50))
+
+
+def test_dry_run_spills_outside_the_project(tmp_path):
+    import os
+
+    project = path.join(tmp_path, "project")
+    makedirs(project)
+    staged = StagedFileSystem(src_path=project, spill_threshold=0, dry_run=True)
+    with staged.open("my_file.txt", "w") as fid:
+        fid.write("Some content")
+
+    assert staged.stg_fs.spilled
+    assert not staged.stg_fs.spill_path.startswith(project)
+    assert os.listdir(project) == []
+
+
+def test_close_removes_spilled_staging(tmp_path):
+    with StagedFileSystem(src_path=str(tmp_path), spill_threshold=0) as staged:
+        with staged.open("my_file.txt", "w") as fid:
+            fid.write("Some content")
+        spill_path = staged.stg_fs.spill_path
+        staged.commit()
+        assert path.isdir(spill_path)
+
+    assert not path.exists(spill_path)
+    assert staged.src_fs.readtext("my_file.txt") == "Some content"
+
+
+def test_parallel_diff_and_commit(tmp_path):
+    import threading
+
+    staged = StagedFileSystem(src_path=str(tmp_path), workers=4)
+    for i in range(8):
+        staged.src_fs.writetext(f"modified_{i}.txt", "old")
+        staged.stg_fs.writetext(f"modified_{i}.txt", "new")
+        staged.src_fs.writetext(f"unchanged_{i}.txt", "same")
+        staged.stg_fs.writetext(f"unchanged_{i}.txt", "same")
+        with staged.open(f"dir/created_{i}.txt", "w") as fid:
+            fid.write("created")
+
+    threads = set()
+    compare = StagedFileSystem._check_hashes_equal
+
+    def record_thread(self, *args):
+        threads.add(threading.get_ident())
+        return compare(self, *args)
+
+    with patch.object(StagedFileSystem, "_check_hashes_equal", record_thread):
+        result = staged.diff()
+    staged.commit()
+
+    assert threading.get_ident() not in threads
+    assert result.created_files == [f"/dir/created_{i}.txt" for i in range(8)]
+    assert result.modified_files == [f"/modified_{i}.txt" for i in range(8)]
+    assert len(result.unchanged_files) == 8
+    assert all(staged.src_fs.readtext(f) == "new" for f in result.modified_files)
+    assert all(staged.src_fs.exists(f) for f in result.created_files)
+
+
+def test_open_reads_through_to_source_without_staging(fs):
+    fs.src_fs.makedirs("app")
+    fs.src_fs.writetext("app/routes.py", "routes = []\n")
+    view = fs.scoped("app")
+
+    with view.open("routes.py") as fid:
+        assert fid.read() == "routes = []\n"
+
+    assert view.exists("routes.py")
+    assert not fs.stg_fs.exists("app/routes.py")
+
+
+def test_open_copies_source_on_append(fs):
+    fs.src_fs.makedirs("app")
+    fs.src_fs.writetext("app/routes.py", "routes = []\n")
+    fs.src_fs.writetext("app/untouched.py", "")
+    view = fs.scoped("app")
+
+    with view.open("routes.py", "a") as fid:
+        fid.write("routes.append('widget')\n")
+
+    assert fs.stg_fs.readtext("app/routes.py") == (
+        "routes = []\nroutes.append('widget')\n"
+    )
+    assert not fs.stg_fs.exists("app/untouched.py")
+    assert fs.diff().modified_files == ["/app/routes.py"]
+
+
+def test_open_does_not_resurrect_deleted_files(fs):
+    from fs.errors import ResourceNotFound
+
+    fs.src_fs.writetext("existing.txt", "Original")
+    with fs.open("existing.txt", "a") as fid:
+        fid.write(" appended")
+    fs.delete("existing.txt")
+
+    assert not fs.exists("existing.txt")
+    with pytest.raises(ResourceNotFound):
+        fs.open("existing.txt")
+    assert not fs.stg_fs.exists("existing.txt")
+
+    with fs.open("existing.txt", "a") as fid:
+        fid.write("Recreated")
+    assert fs.stg_fs.readtext("existing.txt") == "Recreated"
+    assert fs.diff().deleted_files == []
+
+
+def test_open_for_writing_does_not_copy_source(fs):
+    fs.src_fs.writetext("routes.py", "routes = []\n")
+
+    with patch("fs.copy.copy_file") as mock:
+        with fs.open("routes.py", "w") as fid:
+            fid.write("replaced")
+
+    mock.assert_not_called()
+    assert fs.stg_fs.readtext("routes.py") == "replaced"
+
+
+def test_iter_unified_diffs(fs):
+    fs.src_fs.writetext("routes.py", "a\nb\n")
+    fs.stg_fs.writetext("routes.py", "a\nc")
+    fs.src_fs.writetext("unchanged.py", "same")
+    fs.stg_fs.writetext("unchanged.py", "same")
+
+    lines = list(fs.iter_unified_diffs())
+
+    assert lines == [
+        "--- a/routes.py\n",
+        "+++ b/routes.py\n",
+        "@@ -1,2 +1,2 @@\n",
+        " a\n",
+        "-b\n",
+        "+c\n\\ No newline at end of file\n",
+    ]
+
+
+def test_iter_unified_diffs_skips_binary_and_large_files(fs):
+    fs.src_fs.writebytes("image.png", b"\x89PNG\0\x01")
+    fs.stg_fs.writebytes("image.png", b"\x89PNG\0\x02")
+    fs.src_fs.writetext("large.txt", "a" * 16)
+    fs.stg_fs.writetext("large.txt", "b" * 16)
+
+    lines = list(fs.iter_unified_diffs(max_size=8))
+
+    assert lines == [
+        "Binary files a/image.png and b/image.png differ\n",
+        "Diff of large.txt skipped: larger than 8 bytes\n",
+    ]
+
+
+def test_print_fs_diff_shows_diffs_when_enabled(fs, capsys):
+    fs.show_diffs = True
+    fs.src_fs.writetext("routes.py", "old\n")
+    fs.stg_fs.writetext("routes.py", "new\n")
+
+    fs.print_fs_diff()
+
+    out = capsys.readouterr().out
+    assert "-old" in out
+    assert "+new" in out
+
+
+def test_stat_cache_avoids_reading_unchanged_sources(tmp_path):
+    from .statcache import StatCache
+
+    cache_path = path.join(tmp_path, ".flaskerize", "cache")
+    first = StagedFileSystem(src_path=str(tmp_path), stat_cache=StatCache(cache_path))
+    with first.open("created.txt", "w") as fid:
+        fid.write("created")
+    first.commit()
+
+    second = StagedFileSystem(src_path=str(tmp_path), stat_cache=StatCache(cache_path))
+    with second.open("created.txt", "w") as fid:
+        fid.write("created")
+    with patch.object(second.src_fs, "openbin", side_effect=AssertionError):
+        assert second.diff().unchanged_files == ["/created.txt"]
+
+    with second.open("created.txt", "w") as fid:
+        fid.write("changed")
+    assert second.diff().modified_files == ["/created.txt"]
+
+
+def test_commit_writes_through_symlinks(fs, tmp_path):
+    import os
+
+    with open(path.join(tmp_path, "target.txt"), "w") as fid:
+        fid.write("old")
+    os.symlink("target.txt", path.join(tmp_path, "link.txt"))
+
+    with fs.open("link.txt", "w") as fid:
+        fid.write("new")
+    fs.commit()
+
+    assert path.islink(path.join(tmp_path, "link.txt"))
+    with open(path.join(tmp_path, "target.txt")) as fid:
+        assert fid.read() == "new"
+
+
+def test_commit_keeps_hard_links(fs, tmp_path):
+    import os
+
+    with open(path.join(tmp_path, "a.txt"), "w") as fid:
+        fid.write("old")
+    os.link(path.join(tmp_path, "a.txt"), path.join(tmp_path, "b.txt"))
+
+    with fs.open("a.txt", "w") as fid:
+        fid.write("new")
+    fs.commit()
+
+    assert os.stat(path.join(tmp_path, "a.txt")).st_nlink == 2
+    with open(path.join(tmp_path, "b.txt")) as fid:
+        assert fid.read() == "new"
+
+
+def test_commit_reads_umask_without_setting_it(fs, tmp_path):
+    import os
+    import sys
+
+    if not sys.platform.startswith("linux"):
+        pytest.skip("The umask can only be read without setting it on Linux")
+    with fs.open("new.txt", "w") as fid:
+        fid.write("new")
+
+    with patch("os.umask") as mock_umask:
+        fs.commit()
+
+    mock_umask.assert_not_called()
+    assert path.isfile(path.join(tmp_path, "new.txt"))
@@ -0,0 +1,100 @@
+import threading
+from typing import Any, Dict, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from fs.base import FS
+    from flaskerize.fileio import StagedFileSystem
+
+LOCKFILE_VERSION = 1
+DEFAULT_LOCKFILE_NAME = "flaskerize.lock"
+
+
+def hash_bytes(data: bytes) -> str:
+    import hashlib
+
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_context(context: Dict[str, Any]) -> str:
+    """Hash a render context independently of key order"""
+
+    import json
+
+    return hash_bytes(json.dumps(context, sort_keys=True, default=str).encode("utf-8"))
+
+
+class RenderLock:
+    """
+    Lockfile recording, for each output path, the hash of the schematic file it was
+    rendered from, the hash of the render context and the hash and size of the
+    rendered content. Outputs whose inputs are unchanged since the last render, and
+    which are still present on disk with the recorded size, can be skipped without
+    rendering or hashing them.
+    """
+
+    def __init__(self, path: str = DEFAULT_LOCKFILE_NAME):
+        self.path = path
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def load(self, src_fs: "FS") -> None:
+        """Load existing entries from the source file system, if not yet loaded"""
+
+        import json
+
+        if self._entries is not None:
+            return
+        self._entries = {}
+        if src_fs.isfile(self.path):
+            with src_fs.open(self.path, "r") as fid:
+                data = json.load(fid)
+            if data.get("version") == LOCKFILE_VERSION:
+                self._entries = data.get("outputs", {})
+
+    def is_fresh(
+        self, src_fs: "FS", outpath: str, source_hash: str, context_hash: str
+    ) -> bool:
+        """Check whether an output is up to date with respect to its inputs"""
+
+        entry = (self._entries or {}).get(outpath)
+        if entry is None:
+            return False
+        if entry["source"] != source_hash or entry["context"] != context_hash:
+            return False
+        return src_fs.isfile(outpath) and src_fs.getsize(outpath) == entry["size"]
+
+    def record(
+        self,
+        outpath: str,
+        source_hash: str,
+        context_hash: str,
+        rendered_hash: str,
+        size: int,
+    ) -> None:
+        with self._lock:
+            if self._entries is None:
+                self._entries = {}
+            self._entries[outpath] = {
+                "source": source_hash,
+                "context": context_hash,
+                "rendered": rendered_hash,
+                "size": size,
+            }
+
+    def save(self, staged_fs: "StagedFileSystem") -> None:
+        """Stage the lockfile so that it is committed along with the outputs"""
+
+        import json
+        import fs.path
+
+        with self._lock:
+            contents = json.dumps(
+                {"version": LOCKFILE_VERSION, "outputs": self._entries or {}},
+                indent=2,
+                sort_keys=True,
+            )
+        dirname = fs.path.dirname(self.path)
+        if dirname:
+            staged_fs.stg_fs.makedirs(dirname, recreate=True)
+        with staged_fs.stg_fs.open(self.path, "w") as fid:
+            fid.write(contents)
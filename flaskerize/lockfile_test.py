@@ -0,0 +1,104 @@
+import json
+import os
+from os import path
+from unittest.mock import patch
+
+import pytest
+
+from .lockfile import RenderLock, hash_context
+from .render import SchematicRenderer
+
+
+@pytest.fixture
+def schematic_path(make_schematic):
+    return make_schematic(static=True)
+
+
+def _render(schematic_path, src_path, args):
+    renderer = SchematicRenderer(
+        schematic_path=schematic_path, src_path=src_path, lock=RenderLock()
+    )
+    renderer.render(name="widget", args=args)
+    return renderer
+
+
+def test_hash_context_ignores_key_order():
+    assert hash_context({"a": 1, "b": 2}) == hash_context({"b": 2, "a": 1})
+
+
+def test_lockfile_is_written(schematic_path, tmp_path):
+    src_path = path.join(tmp_path, "results")
+    _render(schematic_path, src_path, ["hello"])
+
+    with open(path.join(src_path, "flaskerize.lock")) as fid:
+        data = json.load(fid)
+    assert set(data["outputs"]) == {"widget.txt", "static.txt"}
+    assert data["outputs"]["widget.txt"]["size"] == len("hello widget!")
+
+
+def test_lockfile_records_hash_of_written_outputs(schematic_path, tmp_path):
+    from .lockfile import hash_bytes
+
+    src_path = path.join(tmp_path, "results")
+    _render(schematic_path, src_path, ["hello"])
+
+    with open(path.join(src_path, "flaskerize.lock")) as fid:
+        outputs = json.load(fid)["outputs"]
+    for filename, entry in outputs.items():
+        with open(path.join(src_path, filename), "rb") as fid:
+            assert entry["rendered"] == hash_bytes(fid.read())
+        assert entry["rendered"] != entry["source"]
+
+
+def test_unchanged_outputs_are_skipped(schematic_path, tmp_path):
+    src_path = path.join(tmp_path, "results")
+    _render(schematic_path, src_path, ["hello"])
+
+    with patch.object(SchematicRenderer, "_get_template") as mock:
+        renderer = _render(schematic_path, src_path, ["hello"])
+
+    mock.assert_not_called()
+    assert sorted(renderer.skipped_files) == ["static.txt", "widget.txt"]
+    assert renderer.fs.get_created_files() == []
+
+
+def test_outputs_are_rerendered_when_context_changes(schematic_path, tmp_path):
+    src_path = path.join(tmp_path, "results")
+    _render(schematic_path, src_path, ["hello"])
+
+    renderer = _render(schematic_path, src_path, ["goodbye"])
+
+    assert renderer.skipped_files == ["static.txt"]
+    with open(path.join(src_path, "widget.txt")) as fid:
+        assert fid.read() == "goodbye widget!"
+
+
+def test_outputs_are_rerendered_when_missing(schematic_path, tmp_path):
+    src_path = path.join(tmp_path, "results")
+    _render(schematic_path, src_path, ["hello"])
+    os.remove(path.join(src_path, "widget.txt"))
+
+    renderer = _render(schematic_path, src_path, ["hello"])
+
+    assert renderer.skipped_files == ["static.txt"]
+    assert path.isfile(path.join(src_path, "widget.txt"))
+
+
+@pytest.mark.parametrize("filename", ["custom_functions.py", "run.py", "schema.json"])
+def test_outputs_are_rerendered_when_schematic_modules_change(
+    schematic_path, tmp_path, filename
+):
+    src_path = path.join(tmp_path, "results")
+    _render(schematic_path, src_path, ["hello"])
+    contents = {
+        "custom_functions.py": "# edited\n",
+        "run.py": "from flaskerize.render import default_run as run\n",
+        "schema.json": '{"options": [{"arg": "greeting", "type": "str", '
+        '"help": "edited"}]}',
+    }[filename]
+    with open(path.join(schematic_path, filename), "w") as fid:
+        fid.write(contents)
+
+    renderer = _render(schematic_path, src_path, ["hello"])
+
+    assert renderer.skipped_files == []
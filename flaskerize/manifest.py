@@ -0,0 +1,162 @@
+import os
+import re
+from typing import Iterable, List, NamedTuple, Pattern
+
+
+class SchematicManifest(NamedTuple):
+    """
+    Classification of every entry within a schematic's files/ directory. All paths
+    are relative to the files/ directory and use forward slashes.
+    """
+
+    templates: List[str]
+    static: List[str]
+    ignored: List[str]
+    directories: List[str]
+
+
+def compile_glob(pattern: str) -> Pattern:
+    """
+    Compile a pathlib-style glob pattern into a regex that matches full relative
+    paths. `**` matches zero or more directories, while `*`, `?` and `[...]` never
+    match across a path separator.
+    """
+
+    parts = []
+    segments = pattern.replace("\\", "/").strip("/").split("/")
+    for i, segment in enumerate(segments):
+        is_last = i == len(segments) - 1
+        if segment == "**":
+            parts.append(".*" if is_last else "(?:[^/]+/)*")
+            continue
+        parts.append(_translate_segment(segment) + ("" if is_last else "/"))
+    return re.compile("".join(parts) + r"\Z")
+
+
+def _translate_segment(segment: str) -> str:
+    result = []
+    i, n = 0, len(segment)
+    while i < n:
+        c = segment[i]
+        i += 1
+        if c == "*":
+            result.append("[^/]*")
+        elif c == "?":
+            result.append("[^/]")
+        elif c == "[":
+            j = segment.find("]", i + 1 if i < n and segment[i] in "!]" else i)
+            if j == -1:
+                result.append(re.escape(c))
+                continue
+            chars = segment[i:j].replace("\\", "\\\\")
+            if chars.startswith("!"):
+                chars = "^" + chars[1:]
+            result.append(f"[{chars}]")
+            i = j + 1
+        else:
+            result.append(re.escape(c))
+    return "".join(result)
+
+
+def _matches_any(path: str, patterns: Iterable[Pattern]) -> bool:
+    return any(p.match(path) for p in patterns)
+
+
+DEFAULT_IGNORE_FILES = [".fzignore"]
+
+
+def parse_ignore_file(filename: str) -> List[str]:
+    """
+    Read a .gitignore-style file into glob patterns that are relative to the
+    directory containing it. Negated (`!`) patterns are not supported and skipped.
+    """
+
+    patterns: List[str] = []
+    with open(filename, "r") as fid:
+        for line in fid:
+            line = line.strip()
+            if not line or line.startswith("#") or line.startswith("!"):
+                continue
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            base = line.lstrip("/") if "/" in line else "**/" + line
+            if not dir_only:
+                patterns.append(base)
+            patterns.append(base + "/**")
+    return patterns
+
+
+def load_ignore_files(root: str, filenames: Iterable[str]) -> List[str]:
+    """Load the patterns of every existing ignore file, relative to root"""
+
+    patterns: List[str] = []
+    for filename in filenames:
+        path = os.path.join(root, filename)
+        if os.path.isfile(path):
+            patterns.extend(parse_ignore_file(path))
+    return patterns
+
+
+def build_manifest(
+    files_path: str,
+    template_patterns: List[str],
+    ignore_patterns: List[str],
+    ignore_root: str = "",
+    exclude_patterns: Iterable[str] = (),
+) -> SchematicManifest:
+    """
+    Build a manifest of a schematic's files/ directory with a single walk.
+
+    Args:
+        files_path (str): path to the schematic's files/ directory
+        template_patterns (List[str]): glob patterns, relative to files_path, of
+            files to be rendered as Jinja templates
+        ignore_patterns (List[str]): glob patterns of files to leave out of the
+            output entirely
+        ignore_root (str, optional): path of files_path relative to the root that
+            ignore_patterns are expressed against. Defaults to "".
+        exclude_patterns (Iterable[str], optional): glob patterns, such as those
+            loaded from .fzignore files, of files and directories that are not walked
+            at all. Expressed against the same root as ignore_patterns.
+    """
+
+    compiled_templates = [compile_glob(p) for p in template_patterns]
+    compiled_ignores = [compile_glob(p) for p in ignore_patterns]
+    compiled_excludes = [compile_glob(p) for p in exclude_patterns]
+    ignore_prefix = ignore_root.replace("\\", "/").strip("/")
+    if ignore_prefix:
+        ignore_prefix += "/"
+
+    templates: List[str] = []
+    static: List[str] = []
+    ignored: List[str] = []
+    directories: List[str] = []
+    for dirpath, dirnames, filenames in os.walk(files_path):
+        rel_dir = os.path.relpath(dirpath, files_path).replace(os.sep, "/")
+        rel_dir = "" if rel_dir == "." else rel_dir + "/"
+        # Prune excluded directories in place so that os.walk never descends into them
+        dirnames[:] = [
+            d
+            for d in dirnames
+            if not _matches_any(ignore_prefix + rel_dir + d + "/", compiled_excludes)
+        ]
+        directories.extend(rel_dir + d for d in dirnames)
+        for filename in filenames:
+            rel_path = rel_dir + filename
+            if _matches_any(ignore_prefix + rel_path, compiled_excludes):
+                ignored.append(rel_path)
+            elif _matches_any(ignore_prefix + rel_path, compiled_ignores):
+                ignored.append(rel_path)
+            elif _matches_any(rel_path, compiled_templates):
+                templates.append(rel_path)
+            else:
+                static.append(rel_path)
+
+    return SchematicManifest(
+        templates=sorted(templates),
+        static=sorted(static),
+        ignored=sorted(ignored),
+        directories=sorted(directories),
+    )
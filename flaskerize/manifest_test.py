@@ -0,0 +1,87 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from .manifest import build_manifest, compile_glob, parse_ignore_file
+
+
+@pytest.mark.parametrize(
+    "pattern, path, expected",
+    [
+        ("**/*.template", "a.template", True),
+        ("**/*.template", "x/y/a.template", True),
+        ("**/*.template", "x/y/a.txt", False),
+        ("*.template", "x/a.template", False),
+        ("x/*.py", "x/a.py", True),
+        ("x/*.py", "x/y/a.py", False),
+        ("x/?.py", "x/a.py", True),
+        ("x/[ab].py", "x/b.py", True),
+        ("x/[!ab].py", "x/b.py", False),
+        ("**/{{ name }}.template", "{{ name }}.template", True),
+    ],
+)
+def test_compile_glob(pattern, path, expected):
+    assert bool(compile_glob(pattern).match(path)) == expected
+
+
+def test_build_manifest_classifies_files(tmp_path):
+    files_path = os.path.join(tmp_path, "files")
+    os.makedirs(os.path.join(files_path, "nested/deeper"))
+    for name in [
+        "a.txt.template",
+        "b.txt.template",
+        "static.txt",
+        "nested/c.py.template",
+        "nested/deeper/helper.py",
+    ]:
+        Path(os.path.join(files_path, name)).touch()
+
+    manifest = build_manifest(
+        files_path,
+        template_patterns=["**/*.template"],
+        ignore_patterns=["**/b.txt.template", "files/nested/deeper/*.py"],
+        ignore_root="files",
+    )
+
+    assert manifest.templates == ["a.txt.template", "nested/c.py.template"]
+    assert manifest.static == ["static.txt"]
+    assert manifest.ignored == ["b.txt.template", "nested/deeper/helper.py"]
+    assert manifest.directories == ["nested", "nested/deeper"]
+
+
+def test_parse_ignore_file(tmp_path):
+    ignore_file = os.path.join(tmp_path, ".fzignore")
+    Path(ignore_file).write_text(
+        "# comment\n\n__pycache__/\n*.pyc\n/files/skip\n!keep\n"
+    )
+
+    patterns = parse_ignore_file(ignore_file)
+
+    assert patterns == [
+        "**/__pycache__/**",
+        "**/*.pyc",
+        "**/*.pyc/**",
+        "files/skip",
+        "files/skip/**",
+    ]
+
+
+def test_build_manifest_prunes_excluded_directories(tmp_path):
+    files_path = os.path.join(tmp_path, "files")
+    os.makedirs(os.path.join(files_path, "pkg/__pycache__"))
+    Path(files_path, "pkg/mod.py").touch()
+    Path(files_path, "pkg/stale.pyc").touch()
+    Path(files_path, "pkg/__pycache__/mod.pyc").touch()
+
+    manifest = build_manifest(
+        files_path,
+        template_patterns=[],
+        ignore_patterns=[],
+        ignore_root="files",
+        exclude_patterns=["**/__pycache__/**", "**/*.pyc"],
+    )
+
+    assert manifest.static == ["pkg/mod.py"]
+    assert manifest.ignored == ["pkg/stale.pyc"]
+    assert manifest.directories == ["pkg"]
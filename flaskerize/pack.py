@@ -0,0 +1,278 @@
+import os
+import sys
+from types import CodeType, ModuleType
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+PACK_EXTENSION = ".fzpack"
+PACK_FORMAT_VERSION = 1
+
+MANIFEST_FILENAME = "manifest.json"
+FILES_DIRNAME = "files"
+COMPILED_DIRNAME = "compiled"
+PACKED_MODULES = ["run.py", "custom_functions.py"]
+
+
+def is_pack(path: str) -> bool:
+    """Check if a path refers to a packed schematic"""
+
+    import zipfile
+
+    return os.path.isfile(path) and zipfile.is_zipfile(path)
+
+
+def _get_compiler_tag() -> str:
+    """
+    Tag identifying the interpreter and Jinja version used to compile templates.
+    Precompiled code is only reused if the tags match.
+    """
+
+    import jinja2
+    from jinja2.bccache import bc_magic
+
+    return f"{sys.implementation.cache_tag}-jinja{jinja2.__version__}-{bc_magic.hex()}"
+
+
+def _iter_source_files(schematic_path: str) -> Iterator[Tuple[str, str]]:
+    """Yield the relative and full path of each source file of a schematic"""
+
+    for root, dirnames, filenames in os.walk(schematic_path):
+        dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+        for filename in sorted(filenames):
+            if filename.endswith((".pyc", PACK_EXTENSION)):
+                continue
+            full_path = os.path.join(root, filename)
+            relpath = os.path.relpath(full_path, schematic_path).replace(os.sep, "/")
+            yield relpath, full_path
+
+
+def get_source_stamp(schematic_path: str) -> str:
+    """
+    Cheap stamp of a schematic directory from the size and modification time of
+    each file. If it matches the stamp recorded in a pack, the directory is assumed
+    unchanged without reading it.
+    """
+
+    import hashlib
+
+    stamp = hashlib.sha1()
+    for relpath, full_path in _iter_source_files(schematic_path):
+        stat = os.stat(full_path)
+        stamp.update(f"{relpath}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+    return stamp.hexdigest()
+
+
+def get_source_digest(schematic_path: str) -> str:
+    """
+    Digest of the contents of a schematic directory, recorded in packs so that a
+    pack can be checked against the directory it was built from
+    """
+
+    import hashlib
+
+    digest = hashlib.sha1()
+    for relpath, full_path in _iter_source_files(schematic_path):
+        with open(full_path, "rb") as fid:
+            contents = fid.read()
+        digest.update(relpath.encode("utf-8") + b"\0")
+        digest.update(hashlib.sha1(contents).digest())
+    return digest.hexdigest()
+
+
+def _read_meta(zf: Any) -> Dict[str, Any]:
+    import json
+
+    return json.loads(zf.read(MANIFEST_FILENAME).decode("utf-8"))
+
+
+def choose_pack_or_directory(pack_path: str, schematic_path: str) -> str:
+    """
+    Choose between a pack and the schematic directory of the same name alongside
+    it. The pack is only used if it was built from the directory's current
+    contents, so that edits to the directory are never shadowed by a stale pack.
+    The directory's contents are only hashed if its file sizes or modification
+    times differ from when the pack was built.
+    """
+
+    import zipfile
+
+    if not os.path.isdir(schematic_path):
+        return pack_path
+    try:
+        with zipfile.ZipFile(pack_path, "r") as zf:
+            meta = _read_meta(zf)
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        meta = {}
+    if meta.get("source_stamp") == get_source_stamp(schematic_path):
+        return pack_path
+    pack_digest = meta.get("source_digest")
+    if pack_digest is not None and pack_digest == get_source_digest(schematic_path):
+        return pack_path
+    print(
+        f"Ignoring {pack_path}, which is out of date with {schematic_path}",
+        file=sys.stderr,
+    )
+    return schematic_path
+
+
+def pack_schematic(schematic_path: str, output_path: Optional[str] = None) -> str:
+    """
+    Pack a schematic directory into a single artifact containing a manifest, the
+    precompiled Jinja templates, the run.py and custom_functions.py modules, and
+    the static payload.
+
+    Args:
+        schematic_path (str): path to the schematic directory
+        output_path (str, optional): path of the pack to write. Defaults to the
+            schematic directory name with the .fzpack extension, in the current
+            working directory.
+
+    Returns:
+        str: path of the written pack
+    """
+
+    import json
+    import marshal
+    import zipfile
+    from jinja2 import Environment
+
+    from flaskerize.manifest import (
+        DEFAULT_IGNORE_FILES,
+        build_manifest,
+        load_ignore_files,
+    )
+    from flaskerize.parser import _load_schema
+
+    schematic_path = os.path.normpath(schematic_path)
+    if not os.path.isdir(schematic_path):
+        raise ValueError(f"Unable to locate schematic directory {schematic_path}")
+    if output_path is None:
+        output_path = os.path.basename(schematic_path) + PACK_EXTENSION
+
+    schema_path = os.path.join(schematic_path, "schema.json")
+    config: Dict[str, Any] = {}
+    if os.path.isfile(schema_path):
+        # Validate the schema up front so that errors surface at pack time
+        _load_schema(schema_path)
+        with open(schema_path, "r") as fid:
+            config = json.load(fid)
+
+    files_path = os.path.join(schematic_path, FILES_DIRNAME)
+    manifest = build_manifest(
+        files_path,
+        template_patterns=config.get("templateFilePatterns", ["**/*.template"]),
+        ignore_patterns=config.get("ignoreFilePatterns", []),
+        ignore_root=FILES_DIRNAME,
+        exclude_patterns=load_ignore_files(
+            schematic_path, config.get("ignoreFiles", DEFAULT_IGNORE_FILES)
+        ),
+    )
+
+    env = Environment()
+    tmp_output_path = output_path + ".tmp"
+    try:
+        with zipfile.ZipFile(tmp_output_path, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(
+                MANIFEST_FILENAME,
+                json.dumps(
+                    {
+                        "format": PACK_FORMAT_VERSION,
+                        "name": os.path.basename(schematic_path),
+                        "compiler": _get_compiler_tag(),
+                        "source_stamp": get_source_stamp(schematic_path),
+                        "source_digest": get_source_digest(schematic_path),
+                        "config": config,
+                        "manifest": manifest._asdict(),
+                    },
+                    indent=2,
+                ),
+            )
+            for module_filename in PACKED_MODULES:
+                module_path = os.path.join(schematic_path, module_filename)
+                if os.path.isfile(module_path):
+                    zf.write(module_path, module_filename)
+
+            # Explicit directory entries so that empty directories survive packing
+            zf.writestr(FILES_DIRNAME + "/", "")
+            for dirname in manifest.directories:
+                zf.writestr(f"{FILES_DIRNAME}/{dirname}/", "")
+            for filename in manifest.static:
+                zf.write(
+                    os.path.join(files_path, filename), f"{FILES_DIRNAME}/{filename}"
+                )
+            for filename in manifest.templates:
+                full_path = os.path.join(files_path, filename)
+                with open(full_path, "r") as fid:
+                    source = fid.read()
+                zf.writestr(f"{FILES_DIRNAME}/{filename}", source)
+                code = env.compile(source, filename, full_path)
+                zf.writestr(f"{COMPILED_DIRNAME}/{filename}", marshal.dumps(code))
+        os.replace(tmp_output_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_output_path):
+            os.remove(tmp_output_path)
+        raise
+    return output_path
+
+
+class SchematicPack:
+    """Read-only view of a packed schematic"""
+
+    def __init__(self, path: str):
+        import zipfile
+
+        from flaskerize.manifest import SchematicManifest
+
+        self.path = path
+        self._zip = zipfile.ZipFile(path, "r")
+        meta = _read_meta(self._zip)
+        if meta.get("format") != PACK_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported schematic pack format '{meta.get('format')}' in {path}"
+            )
+        self.name: str = meta["name"]
+        self.config: Dict[str, Any] = meta["config"]
+        self.manifest = SchematicManifest(**meta["manifest"])
+        self._compiled_usable = meta.get("compiler") == _get_compiler_tag()
+        self._names = set(self._zip.namelist())
+
+    def open_files_fs(self):
+        """Open the static and template payload as a read-only PyFilesystem"""
+
+        import fs
+
+        return fs.open_fs(f"zip://{self.path}").opendir(FILES_DIRNAME)
+
+    def exists(self, filename: str) -> bool:
+        return filename in self._names
+
+    def read_bytes(self, filename: str) -> Optional[bytes]:
+        """Read a file stored within the pack, or None if it is not present"""
+
+        if filename not in self._names:
+            return None
+        return self._zip.read(filename)
+
+    def get_code(self, template_path: str) -> Optional[CodeType]:
+        """
+        Get the precompiled code for a template, or None if it was compiled by an
+        incompatible interpreter or Jinja version
+        """
+
+        import marshal
+
+        name = f"{COMPILED_DIRNAME}/{template_path}"
+        if not self._compiled_usable or name not in self._names:
+            return None
+        return marshal.loads(self._zip.read(name))
+
+    def load_module(self, name: str, filename: str) -> ModuleType:
+        """Execute a Python module stored within the pack"""
+
+        if filename not in self._names:
+            raise FileNotFoundError(f"No file '{filename}' found in {self.path}")
+        module_path = os.path.join(self.path, filename)
+        source = self._zip.read(filename).decode("utf-8")
+        module = ModuleType(name)
+        module.__file__ = module_path
+        exec(compile(source, module_path, "exec"), module.__dict__)
+        return module
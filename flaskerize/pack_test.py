@@ -0,0 +1,138 @@
+import os
+from os import path
+from unittest.mock import patch
+
+import pytest
+
+from .pack import (
+    SchematicPack,
+    choose_pack_or_directory,
+    is_pack,
+    pack_schematic,
+)
+from .render import SchematicRenderer
+
+
+@pytest.fixture
+def schematic_path(tmp_path):
+    schematic_path = path.join(tmp_path, "schematics/doodad")
+    files_path = path.join(schematic_path, "files")
+    os.makedirs(path.join(files_path, "{{ name }}"))
+    with open(path.join(schematic_path, "schema.json"), "w") as fid:
+        fid.write(
+            """{
+                "templateFilePatterns": ["**/*.template"],
+                "ignoreFilePatterns": ["**/helper.py"],
+                "options": [{"arg": "greeting", "type": "str"}]
+            }"""
+        )
+    with open(path.join(schematic_path, "custom_functions.py"), "w") as fid:
+        fid.write(
+            "from flaskerize import register_custom_function\n\n\n"
+            "@register_custom_function\n"
+            "def shout(val: str) -> str:\n"
+            "    return val.upper()\n"
+        )
+    with open(path.join(files_path, "{{ name }}/hello.txt.template"), "w") as fid:
+        fid.write("{{ greeting }} {{ shout(name) }}!")
+    with open(path.join(files_path, "{{ name }}/static.txt"), "w") as fid:
+        fid.write("static")
+    with open(path.join(files_path, "helper.py"), "w") as fid:
+        fid.write("ignored")
+    return schematic_path
+
+
+def test_pack_schematic_writes_pack(schematic_path, tmp_path):
+    pack_path = pack_schematic(schematic_path, path.join(tmp_path, "doodad.fzpack"))
+
+    assert is_pack(pack_path)
+    pack = SchematicPack(pack_path)
+    assert pack.name == "doodad"
+    assert pack.manifest.templates == ["{{ name }}/hello.txt.template"]
+    assert pack.manifest.static == ["{{ name }}/static.txt"]
+    assert pack.exists("custom_functions.py")
+    assert not pack.exists("run.py")
+    assert pack.get_code("{{ name }}/hello.txt.template") is not None
+
+
+def test_is_pack_false_for_directory(schematic_path):
+    assert not is_pack(schematic_path)
+
+
+def test_render_from_pack_matches_directory(schematic_path, tmp_path):
+    pack_path = pack_schematic(schematic_path, path.join(tmp_path, "doodad.fzpack"))
+    for schematic, outdir in [(schematic_path, "from_dir"), (pack_path, "from_pack")]:
+        SchematicRenderer(
+            schematic_path=schematic, src_path=path.join(tmp_path, outdir)
+        ).render(name="widget", args=["hello"])
+
+    for outdir in ["from_dir", "from_pack"]:
+        with open(path.join(tmp_path, outdir, "widget/hello.txt")) as fid:
+            assert fid.read() == "hello WIDGET!"
+        assert path.isfile(path.join(tmp_path, outdir, "widget/static.txt"))
+        assert not path.exists(path.join(tmp_path, outdir, "helper.py"))
+
+
+def test_render_from_pack_does_not_compile_templates(schematic_path, tmp_path):
+    pack_path = pack_schematic(schematic_path, path.join(tmp_path, "doodad.fzpack"))
+    renderer = SchematicRenderer(schematic_path=pack_path, src_path=str(tmp_path))
+
+    with patch.object(renderer.template_cache, "get_code") as mock:
+        renderer.render(name="widget", args=["hello"])
+
+    mock.assert_not_called()
+
+
+def test_render_from_pack_falls_back_when_compiler_differs(schematic_path, tmp_path):
+    pack_path = pack_schematic(schematic_path, path.join(tmp_path, "doodad.fzpack"))
+    with patch("flaskerize.pack._get_compiler_tag", return_value="other"):
+        renderer = SchematicRenderer(schematic_path=pack_path, src_path=str(tmp_path))
+    renderer.render(name="widget", args=["hi"])
+
+    with open(path.join(tmp_path, "widget/hello.txt")) as fid:
+        assert fid.read() == "hi WIDGET!"
+
+
+def test_pack_schematic_removes_partial_pack_on_error(schematic_path, tmp_path):
+    pack_path = path.join(tmp_path, "doodad.fzpack")
+
+    with patch("marshal.dumps", side_effect=RuntimeError), pytest.raises(RuntimeError):
+        pack_schematic(schematic_path, pack_path)
+
+    assert not path.exists(pack_path + ".tmp")
+    assert not path.exists(pack_path)
+
+
+def test_choose_pack_or_directory_prefers_up_to_date_pack(schematic_path):
+    pack_path = pack_schematic(schematic_path, schematic_path + ".fzpack")
+
+    assert choose_pack_or_directory(pack_path, schematic_path) == pack_path
+
+
+def test_choose_pack_or_directory_skips_digest_when_stamp_matches(schematic_path):
+    pack_path = pack_schematic(schematic_path, schematic_path + ".fzpack")
+
+    with patch("flaskerize.pack.get_source_digest") as mock_digest:
+        assert choose_pack_or_directory(pack_path, schematic_path) == pack_path
+    mock_digest.assert_not_called()
+
+
+def test_choose_pack_or_directory_uses_pack_for_touched_directory(
+    schematic_path, capsys
+):
+    pack_path = pack_schematic(schematic_path, schematic_path + ".fzpack")
+    helper_path = path.join(schematic_path, "files", "helper.py")
+    stat = os.stat(helper_path)
+    os.utime(helper_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert choose_pack_or_directory(pack_path, schematic_path) == pack_path
+    assert capsys.readouterr().err == ""
+
+
+def test_choose_pack_or_directory_ignores_stale_pack(schematic_path, capsys):
+    pack_path = pack_schematic(schematic_path, schematic_path + ".fzpack")
+    with open(path.join(schematic_path, "files", "helper.py"), "w") as fid:
+        fid.write("edited")
+
+    assert choose_pack_or_directory(pack_path, schematic_path) == schematic_path
+    assert "out of date" in capsys.readouterr().err
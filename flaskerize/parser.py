@@ -2,10 +2,18 @@ import os
 from os import path
 import argparse
 import sys
-from typing import Any, Dict, List, Tuple, Optional
+import threading
+from typing import Any, Dict, List, NamedTuple, Tuple, Optional, Union, TYPE_CHECKING
 from importlib.machinery import ModuleSpec
 
-import flaskerize.attach
+# Imports of anything beyond the standard library are deferred to the individual
+# commands so that CLI startup only pays for what the invoked command needs
+
+if TYPE_CHECKING:
+    from flaskerize.cache import TemplateCache
+    from flaskerize.lockfile import RenderLock
+    from flaskerize.report import GenerationReport
+    from flaskerize.statcache import StatCache
 
 
 def _convert_types(cfg: Dict) -> Dict:
@@ -18,22 +26,67 @@ def _convert_types(cfg: Dict) -> Dict:
 def _translate_type(key: str) -> type:
     """Convert type name from JSON schema to corresponding Python type"""
 
-    type_map: Dict[str, type] = {"str": str}
+    type_map: Dict[str, type] = {"str": str, "int": int}
     return type_map[key]
 
 
-def _load_schema(filename: str) -> Dict:
-    import json
+class SchemaSpec(NamedTuple):
+    """
+    A parsed schema: the JSON config as read from disk, which must be treated as
+    read-only, and the (switches, kwargs) with which to construct each argument
+    """
+
+    config: Dict[str, Any]
+    arguments: List[Tuple[List[str], Dict[str, Any]]]
+
+
+# Parsed schemas by absolute path, along with the (mtime, size) they were read at
+_schema_cache: Dict[str, Tuple[Tuple[int, int], SchemaSpec]] = {}
+_schema_cache_lock = threading.Lock()
 
+
+def _compile_schema(cfg: Dict, filename: str = "schema") -> SchemaSpec:
     from .exceptions import InvalidSchema
 
-    with open(filename, "r") as fid:
-        cfg = json.load(fid)
     if "options" not in cfg:
         raise InvalidSchema(f"Required key 'options' not found in '{filename}'")
+    arguments = []
+    for option in cfg["options"]:
+        kwargs = dict(option)
+        switches = [kwargs.pop("arg")] + kwargs.pop("aliases", [])
+        if "type" in kwargs:
+            kwargs["type"] = _translate_type(kwargs["type"])
+        arguments.append((switches, kwargs))
+    return SchemaSpec(config=cfg, arguments=arguments)
 
-    cfg = _convert_types(cfg)
-    return cfg
+
+def load_schema_spec(filename: str) -> SchemaSpec:
+    """
+    Load and compile a schema file, reusing the result for as long as the file's
+    mtime and size are unchanged so that each schema is read once per process
+    """
+
+    import json
+
+    stat = os.stat(filename)
+    key = os.path.abspath(filename)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _schema_cache_lock:
+        cached = _schema_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with open(filename, "r") as fid:
+        spec = _compile_schema(json.load(fid), filename)
+    with _schema_cache_lock:
+        _schema_cache[key] = (version, spec)
+    return spec
+
+
+def _load_schema(filename: str) -> Dict:
+    from copy import deepcopy
+
+    return _convert_types(deepcopy(load_schema_spec(filename).config))
 
 
 class FzArgumentParser(argparse.ArgumentParser):
@@ -41,29 +94,32 @@ class FzArgumentParser(argparse.ArgumentParser):
 
     def __init__(
         self,
-        schema: Optional[str] = None,
+        schema: Optional[Union[str, Dict]] = None,
         xtra_schema_files: Optional[List[str]] = None,
     ):
-        import json
-
         super().__init__()
-        cfgs: List[Dict] = []
+        specs: List[SchemaSpec] = []
         # TODO: consolidate schema and xtra_schema_files
-        if schema:
-            cfgs.append(_load_schema(schema))
+        if isinstance(schema, dict):
+            # Already-parsed schema, such as one loaded from a schematic pack
+            specs.append(_compile_schema(schema))
+        elif schema:
+            specs.append(load_schema_spec(schema))
         if xtra_schema_files:
-            cfgs.extend([_load_schema(file) for file in xtra_schema_files])
+            specs.extend([load_schema_spec(file) for file in xtra_schema_files])
 
-        for cfg in cfgs:
-            for option in cfg["options"]:
-                switches = [option.pop("arg")] + option.pop("aliases", [])
-                self.add_argument(*switches, **option)
+        for spec in specs:
+            for switches, kwargs in spec.arguments:
+                self.add_argument(*switches, **kwargs)
 
 
 class Flaskerize(object):
-    def __init__(self, args):
+    def __init__(self, args: Optional[List[str]] = None):
         import os
 
+        if args is None:
+            # Used as a Python API, without dispatching a command
+            return
         dirname = os.path.dirname(__file__)
         parser = FzArgumentParser(
             os.path.join(os.path.dirname(__file__), "global/schema.json")
@@ -86,6 +142,9 @@ class Flaskerize(object):
         )
         arg_parser.add_argument("bp", type=str, help="Blueprint to attach")
         parse = arg_parser.parse_args(args)
+
+        import flaskerize.attach
+
         flaskerize.attach.attach(parse)
 
     def bundle(self, args):
@@ -159,20 +218,154 @@ class Flaskerize(object):
             schema=os.path.join(os.path.dirname(__file__), "global/generate.json")
         )
         parsed, rest = arg_parser.parse_known_args(args)
+
+        template_cache = None
+        if not parsed.no_template_cache:
+            template_cache = _get_cli_template_cache()
+
+        lock = None
+        if parsed.lockfile:
+            from flaskerize.lockfile import RenderLock
+
+            lock = RenderLock(parsed.lockfile)
+
+        spill_threshold = None
+        if parsed.spill_threshold is not None:
+            spill_threshold = parsed.spill_threshold * 1024 * 1024
+
+        quiet = parsed.report == "json"
+
+        stat_cache = None
+        if not parsed.no_stat_cache and not parsed.dry_run:
+            from flaskerize.statcache import StatCache, get_stat_cache_path
+
+            stat_cache = StatCache(get_stat_cache_path(parsed.from_dir))
+
+        if parsed.batch:
+            from flaskerize.batch import load_batch_plan, render_batch
+
+            if parsed.schematic or parsed.name or rest:
+                arg_parser.error(
+                    "--batch cannot be combined with a schematic, name or "
+                    "schematic arguments; provide these per job in the plan"
+                )
+            staged_fs = render_batch(
+                load_batch_plan(parsed.batch),
+                src_path=parsed.from_dir,
+                dry_run=parsed.dry_run,
+                template_cache=template_cache,
+                workers=parsed.jobs,
+                resolve_schematic=self._check_get_schematic_path_from_name,
+                lock=lock,
+                spill_threshold=spill_threshold,
+                quiet=quiet,
+                show_diffs=parsed.diff,
+                stat_cache=stat_cache,
+            )
+            with staged_fs:
+                if quiet:
+                    print(staged_fs.report().to_json())
+            return
+        if not parsed.schematic or not parsed.name:
+            arg_parser.error("the following arguments are required: schematic, name")
+
         schematic = parsed.schematic
         root_name = parsed.name
         dry_run = parsed.dry_run
         from_dir = parsed.from_dir
         render_dirname, name = path.split(root_name)
 
-        self._check_render_schematic(
+        report = self._check_render_schematic(
             schematic,
             render_dirname=render_dirname,
             src_path=from_dir,
             name=name,
             dry_run=dry_run,
             args=rest,
+            template_cache=template_cache,
+            jobs=parsed.jobs,
+            lock=lock,
+            spill_threshold=spill_threshold,
+            quiet=quiet,
+            show_diffs=parsed.diff,
+            stat_cache=stat_cache,
+        )
+        if quiet:
+            print(report.to_json())
+
+    def pack(self, args):
+        """Pack a schematic directory into a single precompiled artifact"""
+
+        from flaskerize.pack import PACK_EXTENSION, pack_schematic
+
+        arg_parser = FzArgumentParser()
+        arg_parser.add_argument(
+            "schematic",
+            type=str,
+            help="Name of the schematic to pack in 'package_name:schematic' form",
+        )
+        arg_parser.add_argument(
+            "--output",
+            "-o",
+            type=str,
+            help=f"Path of the pack to write. Defaults to <schematic>{PACK_EXTENSION}",
+        )
+        parsed = arg_parser.parse_args(args)
+
+        schematic_path = self._check_get_schematic_path_from_name(
+            parsed.schematic, allow_pack=False
+        )
+        output_path = pack_schematic(schematic_path, parsed.output)
+        print(f"Successfully created {output_path}")
+
+    def serve(self, args):
+        """
+        Serve generate, attach and bundle requests from `fz` clients over a Unix
+        socket, keeping imports, schemas, templates and custom functions warm
+        """
+
+        from flaskerize.exceptions import DaemonAlreadyRunning
+        from flaskerize.server import serve
+
+        arg_parser = FzArgumentParser()
+        arg_parser.add_argument(
+            "--socket",
+            type=str,
+            help="Path of the Unix socket to listen on. Defaults to FLASKERIZE_SOCKET, "
+            "then a socket in $XDG_RUNTIME_DIR named for this Python environment",
         )
+        parsed = arg_parser.parse_args(args)
+        try:
+            serve(parsed.socket)
+        except DaemonAlreadyRunning as e:
+            arg_parser.exit(1, f"{e}\n")
+
+    def list(self, args):
+        """List the schematics available to `fz generate`"""
+
+        from flaskerize.discovery import get_default_index
+
+        arg_parser = FzArgumentParser()
+        arg_parser.add_argument(
+            "--refresh",
+            action="store_true",
+            help="Rebuild the index of installed schematics",
+        )
+        parsed = arg_parser.parse_args(args)
+
+        index = get_default_index()
+        if parsed.refresh:
+            index.refresh()
+        rows = []
+        for info in index.list():
+            # Built-in schematics can be generated without the package prefix
+            name = info.name if info.package == "flaskerize" else info.qualified_name
+            # Listing does not choose between a directory and its pack, which would
+            # mean checking the pack against the directory's contents
+            rows.append((name, info.path or info.pack_path or ""))
+        width = max([len(name) for name, _ in rows], default=0)
+        for name, schematic_path in rows:
+            print(f"{name.ljust(width)}  {schematic_path}")
 
     def _split_pkg_schematic(
         self, pkg_schematic: str, delim: str = ":"
@@ -210,9 +403,22 @@ class Flaskerize(object):
             )
         return schematic_dirname
 
-    def _check_get_schematic_path(self, schematic_dirname: str, schematic: str) -> str:
+    def _check_get_schematic_path(
+        self, schematic_dirname: str, schematic: str, allow_pack: bool = True
+    ) -> str:
+        from flaskerize.pack import PACK_EXTENSION, choose_pack_or_directory
 
         schematic_path = path.join(schematic_dirname, schematic)
+        pack_path = schematic_path + PACK_EXTENSION
+        if allow_pack and path.isfile(pack_path):
+            # Prefer a packed schematic shipped alongside, unless it is out of date
+            return choose_pack_or_directory(pack_path, schematic_path)
+        if (
+            allow_pack
+            and schematic.endswith(PACK_EXTENSION)
+            and path.isfile(schematic_path)
+        ):
+            return schematic_path
         if not path.isdir(schematic_path):
             raise ValueError(
                 f"Unable to locate schematic '{schematic}' in path {schematic_path}"
@@ -222,13 +428,48 @@ class Flaskerize(object):
     def _get_pkg_path_from_spec(self, spec: ModuleSpec) -> str:
         return path.dirname(spec.origin)
 
-    def _check_get_schematic(self, schematic: str, pkg_path: str) -> str:
+    def _check_get_schematic(
+        self, schematic: str, pkg_path: str, allow_pack: bool = True
+    ) -> str:
 
         # pkg_path: str = path.dirname(spec.origin)
         schematic_dirname = self._check_get_schematic_dirname(pkg_path)
-        schematic_path = self._check_get_schematic_path(schematic_dirname, schematic)
+        schematic_path = self._check_get_schematic_path(
+            schematic_dirname, schematic, allow_pack=allow_pack
+        )
         return schematic_path
 
+    def _check_get_schematic_path_from_name(
+        self, pkg_schematic: str, delim: str = ":", allow_pack: bool = True
+    ) -> str:
+        """Resolve a schematic name in 'package_name:schematic' form to its path"""
+
+        from flaskerize.pack import PACK_EXTENSION
+
+        if (
+            allow_pack
+            and pkg_schematic.endswith(PACK_EXTENSION)
+            and path.isfile(pkg_schematic)
+        ):
+            # Path directly to a packed schematic
+            return pkg_schematic
+
+        pkg_or_path, schematic = self._split_pkg_schematic(pkg_schematic, delim=delim)
+
+        if _is_pathlike(pkg_or_path):
+            pkg_path = pkg_or_path
+        else:
+            from flaskerize.discovery import get_default_index
+
+            # Indexed schematics resolve without probing the package on disk
+            info = get_default_index().get(pkg_or_path, schematic)
+            indexed_path = info.get_path(allow_pack) if info is not None else None
+            if indexed_path is not None:
+                return indexed_path
+            module_spec = self._check_validate_package(pkg_or_path)
+            pkg_path = self._get_pkg_path_from_spec(module_spec)
+        return self._check_get_schematic(schematic, pkg_path, allow_pack=allow_pack)
+
     def _check_render_schematic(
         self,
         pkg_schematic: str,
@@ -238,26 +479,35 @@ class Flaskerize(object):
         args: List[Any],
         dry_run: bool = False,
         delim: str = ":",
-    ) -> None:
+        template_cache: Optional["TemplateCache"] = None,
+        jobs: int = 1,
+        lock: Optional["RenderLock"] = None,
+        spill_threshold: Optional[int] = None,
+        quiet: bool = False,
+        show_diffs: bool = False,
+        stat_cache: Optional["StatCache"] = None,
+    ) -> Optional["GenerationReport"]:
         from os import path
 
         from flaskerize import generate
 
-        pkg_or_path, schematic = self._split_pkg_schematic(pkg_schematic, delim=delim)
-
-        if _is_pathlike(pkg_or_path):
-            pkg_path = pkg_or_path
-        else:
-            module_spec = self._check_validate_package(pkg_or_path)
-            pkg_path = self._get_pkg_path_from_spec(module_spec)
-        schematic_path = self._check_get_schematic(schematic, pkg_path)
-        self.render_schematic(
+        schematic_path = self._check_get_schematic_path_from_name(
+            pkg_schematic, delim=delim
+        )
+        return self.render_schematic(
             schematic_path,
             render_dirname=render_dirname,
             src_path=src_path,
             name=name,
             dry_run=dry_run,
             args=args,
+            template_cache=template_cache,
+            jobs=jobs,
+            lock=lock,
+            spill_threshold=spill_threshold,
+            quiet=quiet,
+            show_diffs=show_diffs,
+            stat_cache=stat_cache,
         )
 
     def render_schematic(
@@ -268,15 +518,62 @@ class Flaskerize(object):
         args: List[Any],
         src_path: str = ".",
         dry_run: bool = False,
-    ) -> None:
+        template_cache: Optional["TemplateCache"] = None,
+        jobs: int = 1,
+        lock: Optional["RenderLock"] = None,
+        spill_threshold: Optional[int] = None,
+        quiet: bool = False,
+        show_diffs: bool = False,
+        stat_cache: Optional["StatCache"] = None,
+    ) -> Optional["GenerationReport"]:
         from flaskerize.render import SchematicRenderer
 
-        SchematicRenderer(
-            schematic_path,
-            src_path=src_path,
-            output_prefix=render_dirname,
-            dry_run=dry_run,
-        ).render(name, args)
+        from flaskerize.fileio import StagedFileSystem
+
+        staged_fs = None
+        if spill_threshold is not None or show_diffs or stat_cache is not None:
+            # Otherwise the renderer's own in-memory staging area suffices
+            staged_fs = StagedFileSystem(
+                src_path=src_path,
+                dry_run=dry_run,
+                spill_threshold=spill_threshold,
+                workers=jobs,
+                show_diffs=show_diffs,
+                stat_cache=stat_cache,
+            )
+        try:
+            return SchematicRenderer(
+                schematic_path,
+                src_path=src_path,
+                output_prefix=render_dirname,
+                dry_run=dry_run,
+                template_cache=template_cache,
+                jobs=jobs,
+                staged_fs=staged_fs,
+                quiet=quiet,
+                lock=lock,
+            ).render(name, args)
+        finally:
+            if staged_fs is not None:
+                staged_fs.close()
+
+
+_cli_template_cache: Optional["TemplateCache"] = None
+
+
+def _get_cli_template_cache() -> "TemplateCache":
+    """
+    Get the disk-backed template cache used by the CLI. It is shared by every command
+    run in this process, so that a `fz serve` daemon keeps compiled templates warm.
+    """
+
+    global _cli_template_cache
+    if _cli_template_cache is None:
+        from flaskerize.cache import TemplateCache
+        from flaskerize.utils import default_cache_dir
+
+        _cli_template_cache = TemplateCache(directory=default_cache_dir("templates"))
+    return _cli_template_cache
 
 
 def _is_pathlike(value: str) -> bool:
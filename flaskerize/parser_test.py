@@ -232,3 +232,125 @@ def test__split_pkg_schematic_only_grabs_last_delim(test_flaskerize_args, tmp_pa
     pkg, schematic = fz._split_pkg_schematic("path/to/:my:/schematic:schematic")
     assert pkg == "path/to/:my:/schematic"
     assert schematic == "schematic"
+
+
+def _run_python(code: str, *flags: str):
+    import subprocess
+    import sys
+
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+
+def test_cli_startup_does_not_import_heavy_dependencies():
+    heavy = ["jinja2", "fs", "termcolor", "flaskerize.attach", "flaskerize.render"]
+    result = _run_python(
+        "import sys; import flaskerize.parser; "
+        f"print(','.join(m for m in {heavy!r} if m in sys.modules))"
+    )
+
+    assert result.stdout.strip() == ""
+
+
+def test_cli_startup_without_daemon_does_not_import_heavy_dependencies():
+    """Guard the path bin/fz takes before falling back to running in-process"""
+
+    heavy = ["jinja2", "fs", "termcolor", "flaskerize.parser", "importlib.metadata"]
+    result = _run_python(
+        "import os, sys; os.environ.pop('FLASKERIZE_SOCKET', None); "
+        "from flaskerize.server import forward_to_daemon; "
+        "assert forward_to_daemon(['fz', 'generate', 'x', 'y']) is None; "
+        f"print(','.join(m for m in {heavy!r} if m in sys.modules))"
+    )
+
+    assert result.stdout.strip() == ""
+
+
+def test_cli_startup_import_time_benchmark():
+    """Guard that importing the CLI stays cheaper than importing Jinja alone"""
+
+    result = _run_python(
+        "import flaskerize.server; import flaskerize.parser; import jinja2",
+        "-X",
+        "importtime",
+    )
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        if cumulative_us.strip().isdigit():
+            cumulative[name.strip()] = int(cumulative_us)
+    startup = cumulative["flaskerize.server"] + cumulative["flaskerize.parser"]
+    assert startup < cumulative["jinja2"]
+
+
+def test_schematic_renderer_is_importable_from_package():
+    from flaskerize import SchematicRenderer
+    from flaskerize.render import SchematicRenderer as Expected
+
+    assert SchematicRenderer is Expected
+
+
+def _write_schema(tmp_path, contents: str) -> str:
+    schema_filename = os.path.join(tmp_path, "schema.json")
+    with open(schema_filename, "w") as fid:
+        fid.write(contents)
+    return schema_filename
+
+
+def test_load_schema_spec_reads_each_file_once(tmp_path):
+    import json
+
+    from flaskerize.parser import load_schema_spec
+
+    schema_filename = _write_schema(
+        tmp_path, '{"options": [{"arg": "--count", "type": "int"}]}'
+    )
+
+    with patch("json.load", wraps=json.load) as mock:
+        for _ in range(3):
+            parser = FzArgumentParser(schema=schema_filename)
+            assert parser.parse_args(["--count", "3"]).count == 3
+        spec = load_schema_spec(schema_filename)
+
+    assert mock.call_count == 1
+    assert spec.arguments == [(["--count"], {"type": int})]
+    assert spec.config["options"][0]["type"] == "int"
+
+
+def test_load_schema_spec_reloads_changed_file(tmp_path):
+    from flaskerize.parser import load_schema_spec
+
+    schema_filename = _write_schema(tmp_path, '{"options": []}')
+    assert load_schema_spec(schema_filename).arguments == []
+
+    _write_schema(tmp_path, '{"options": [{"arg": "--extra"}]}')
+    os.utime(schema_filename, ns=(0, 0))
+
+    assert load_schema_spec(schema_filename).arguments == [(["--extra"], {})]
+
+
+def test_render_schematic_only_builds_staging_area_when_needed(tmp_path):
+    with patch("flaskerize.render.SchematicRenderer") as mock_renderer:
+        Flaskerize().render_schematic(
+            "schematic/path", render_dirname="", name="x", args=[], src_path="."
+        )
+        Flaskerize().render_schematic(
+            "schematic/path",
+            render_dirname="",
+            name="x",
+            args=[],
+            src_path=str(tmp_path),
+            show_diffs=True,
+        )
+
+    first, second = mock_renderer.call_args_list
+    assert first[1]["staged_fs"] is None
+    assert second[1]["staged_fs"].show_diffs
@@ -1,14 +1,48 @@
 import os
 import argparse
-from typing import Any, Callable, Dict, List, Optional
+import hashlib
+from types import ModuleType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+    TYPE_CHECKING,
+)
 import fs
+import fs.path
 from termcolor import colored
 
 from flaskerize.parser import FzArgumentParser
 
+if TYPE_CHECKING:
+    from jinja2 import Environment, Template
+    from flaskerize.cache import TemplateCache
+    from flaskerize.fileio import StagedFileSystem
+    from flaskerize.lockfile import RenderLock
+    from flaskerize.manifest import SchematicManifest
+    from flaskerize.report import GenerationReport
+
 DEFAULT_TEMPLATE_PATTERN = ["**/*.template"]
 
 
+class RenderedFile(NamedTuple):
+    """A file staged by render_in_memory, and how it compares to the source"""
+
+    # One of "created", "modified", "unchanged" or "deleted"
+    status: str
+    # Staged contents, or None for a deleted file
+    content: Optional[bytes]
+
+    @property
+    def text(self) -> Optional[str]:
+        return None if self.content is None else self.content.decode("utf-8")
+
+
 class SchematicRenderer:
     """Render Flaskerize schematics"""
 
@@ -21,9 +55,17 @@ class SchematicRenderer:
         src_path: str = ".",
         output_prefix: str = "",
         dry_run: bool = False,
+        template_cache: Optional["TemplateCache"] = None,
+        jobs: int = 1,
+        staged_fs: Optional["StagedFileSystem"] = None,
+        quiet: bool = False,
+        lock: Optional["RenderLock"] = None,
+        env: Optional["Environment"] = None,
     ):
         from jinja2 import Environment
+        from flaskerize.cache import default_template_cache
         from flaskerize.fileio import StagedFileSystem
+        from flaskerize.pack import SchematicPack, is_pack
 
         self.src_path = src_path
         self.output_prefix = output_prefix
@@ -31,29 +73,63 @@ class SchematicRenderer:
         self.schematic_files_path = os.path.join(
             self.schematic_path, self.DEFAULT_FILES_DIRNAME
         )
+        # Packed schematics are loaded directly from their archive
+        self.pack: Optional[SchematicPack] = (
+            SchematicPack(schematic_path) if is_pack(schematic_path) else None
+        )
 
-        self.schema_path = self._get_schema_path()
-        self._load_schema()
+        if staged_fs is not None:
+            # Share an existing staging area, such as across the jobs of a batch
+            self.fs = staged_fs.scoped(output_prefix)
+        else:
+            self.fs = StagedFileSystem(
+                src_path=self.src_path,
+                output_prefix=output_prefix,
+                dry_run=dry_run,
+                workers=jobs,
+            )
 
-        self.arg_parser = self._check_get_arg_parser()
-        self.env = Environment()
-        self.fs = StagedFileSystem(
-            src_path=self.src_path, output_prefix=output_prefix, dry_run=dry_run
-        )
-        self.sch_fs = fs.open_fs(f"osfs://{self.schematic_files_path}")
+        with self.fs.timer.phase("schema_load"):
+            self.schema_path = self._get_schema_path()
+            self._load_schema()
+            self.arg_parser = self._check_get_arg_parser()
+        self.env = env or Environment()
+        self.template_cache = template_cache or default_template_cache
+        if self.pack is not None:
+            self.sch_fs = self.pack.open_files_fs()
+        else:
+            self.sch_fs = fs.open_fs(f"osfs://{self.schematic_files_path}")
         self.dry_run = dry_run
+        self.jobs = max(1, jobs)
+        self.quiet = quiet
+        self._manifest: Optional["SchematicManifest"] = None
+        self._run: Optional[Callable] = None
+        self._path_templates: Dict[str, "Template"] = {}
+        # Renderers of sub-schematics, by schematic path, reused across invocations
+        self._sub_renderers: Dict[str, "SchematicRenderer"] = {}
+
+        # Optional lockfile used to skip outputs whose inputs have not changed
+        self.lock = lock
+        self.skipped_files: List[str] = []
+        self._source_hashes: Dict[str, str] = {}
+        self._schematic_stamp: Optional[bytes] = None
 
     def _load_schema(self) -> None:
-        if self.schema_path:
-            import json
-
-            with open(self.schema_path, "r") as fid:
-                self.config = json.load(fid)
+        if self.pack is not None:
+            self.config = self.pack.config
+        elif self.schema_path:
+            from copy import deepcopy
+            from flaskerize.parser import load_schema_spec
+
+            # Shares the parse with the argument parser built from the same file
+            self.config = deepcopy(load_schema_spec(self.schema_path).config)
         else:
             self.config = {}
 
     def _get_schema_path(self) -> Optional[str]:
 
+        if self.pack is not None:
+            return None
         schema_path = os.path.join(self.schematic_path, "schema.json")
         if not os.path.isfile(schema_path):
             return None
@@ -64,6 +140,8 @@ class SchematicRenderer:
     ) -> FzArgumentParser:
         """Load argument parser from schema.json, if provided"""
 
+        if self.pack is not None and schema_path is None:
+            return FzArgumentParser(schema=self.config or None)
         return FzArgumentParser(schema=schema_path or self.schema_path)
 
     def copy_from_sch(self, src_path: str, dst_path: str = None) -> None:
@@ -72,49 +150,53 @@ class SchematicRenderer:
         dst_path = dst_path or src_path
         dst_dir = os.path.dirname(dst_path)
         if not self.fs.render_fs.exists(dst_dir):
-            self.fs.render_fs.makedirs(dst_dir)
+            self.fs.render_fs.makedirs(dst_dir, recreate=True)
         return fs.copy.copy_file(
             self.sch_fs, src_path, self.fs.render_fs, dst_path or src_path
         )
 
+    def get_manifest(self) -> "SchematicManifest":
+        """
+        Get the manifest classifying every file in the schematic. The schematic is
+        walked once, on first use, and the result is cached on the renderer.
+        """
+
+        from flaskerize.manifest import (
+            DEFAULT_IGNORE_FILES,
+            build_manifest,
+            load_ignore_files,
+        )
+
+        if self._manifest is None and self.pack is not None:
+            self._manifest = self.pack.manifest
+        elif self._manifest is None:
+            with self.fs.timer.phase("discovery"):
+                self._manifest = build_manifest(
+                    self.schematic_files_path,
+                    template_patterns=self.config.get(
+                        "templateFilePatterns", DEFAULT_TEMPLATE_PATTERN
+                    ),
+                    ignore_patterns=self.config.get("ignoreFilePatterns", []),
+                    ignore_root=self.DEFAULT_FILES_DIRNAME,
+                    exclude_patterns=load_ignore_files(
+                        self.schematic_path,
+                        self.config.get("ignoreFiles", DEFAULT_IGNORE_FILES),
+                    ),
+                )
+        return self._manifest
+
     def get_static_files(self) -> List[str]:
         """Get list of files to be copied unchanged"""
 
-        from pathlib import Path
-
-        patterns = self.config.get("templateFilePatterns", DEFAULT_TEMPLATE_PATTERN)
-        all_files = list(str(p) for p in Path(self.schematic_files_path).glob("**/*"))
-        filenames = [os.path.relpath(s, self.schematic_files_path) for s in all_files]
-        filenames = list(set(filenames) - set(self.get_template_files()))
-        return filenames
+        return list(self.get_manifest().static)
 
     def get_template_files(self) -> List[str]:
         """Get list of templated files to be rendered via Jinja"""
 
-        from pathlib import Path
-
-        filenames = []
-        patterns = self.config.get("templateFilePatterns", DEFAULT_TEMPLATE_PATTERN)
-        for pattern in patterns:
-            filenames.extend(
-                [str(p) for p in Path(self.schematic_files_path).glob(pattern)]
-            )
-        ignore_filenames = self._get_ignore_files()
-        filenames = list(set(filenames) - set(ignore_filenames))
-        filenames = [os.path.relpath(s, self.schematic_files_path) for s in filenames]
-
-        return filenames
+        return list(self.get_manifest().templates)
 
     def _get_ignore_files(self) -> List[str]:
-        from pathlib import Path
-
-        ignore_filenames = []
-        ignore_patterns = self.config.get("ignoreFilePatterns", [])
-        for pattern in ignore_patterns:
-            ignore_filenames.extend(
-                [str(p) for p in Path(self.schematic_path).glob(pattern)]
-            )
-        return ignore_filenames
+        return list(self.get_manifest().ignored)
 
     def _generate_outfile(
         self, template_file: str, root: str, context: Optional[Dict] = None
@@ -122,11 +204,33 @@ class SchematicRenderer:
         # TODO: remove the redundant parameter template file that is copied
         # outfile_name = self._get_rel_path(full_path=template_file, rel_to=root)
         outfile_name = "".join(template_file.rsplit(".template"))
-        tpl = self.env.from_string(outfile_name)
+        tpl = self._get_path_template(outfile_name)
+        if tpl is None:
+            return outfile_name
         if context is None:
             context = {}
         return tpl.render(**context)
 
+    def _get_path_template(self, path_pattern: str) -> Optional["Template"]:
+        """
+        Get the compiled template for an output path pattern, or None if the path is
+        a literal containing no Jinja syntax. Templated paths are compiled once per
+        renderer and reused across files and across renders.
+        """
+
+        delimiters = (
+            self.env.variable_start_string,
+            self.env.block_start_string,
+            self.env.comment_start_string,
+        )
+        if not any(d in path_pattern for d in delimiters):
+            return None
+        tpl = self._path_templates.get(path_pattern)
+        if tpl is None:
+            tpl = self.env.from_string(path_pattern)
+            self._path_templates[path_pattern] = tpl
+        return tpl
+
     def render_from_file(self, template_path: str, context: Dict) -> None:
         outpath = self._generate_outfile(template_path, self.src_path, context=context)
         outdir, outfile = os.path.split(outpath)
@@ -134,15 +238,46 @@ class SchematicRenderer:
         rendered_outdir = os.path.join(rendered_outpath, outdir)
 
         if self.sch_fs.isfile(template_path):
+            if self._is_up_to_date(template_path, outpath, context):
+                return
             # TODO: Refactor dry-run and file system interactions to a composable object
             # passed into this class rather than it containing the write logic
-            # with open(template_path, "r") as fid:
-            with self.sch_fs.open(template_path, "r") as fid:
-
-                tpl = self.env.from_string(fid.read())
-
-                with self.fs.open(outpath, "w") as fout:
-                    fout.write(tpl.render(**context))
+            tpl = self._get_template(template_path)
+
+            # Stream rendered chunks straight into the staged file so that memory
+            # use is bounded by chunk size rather than by the size of the output
+            rendered_hash = hashlib.sha256() if self.lock is not None else None
+            size = 0
+            with self.fs.open(outpath, "w") as fout:
+                for chunk in tpl.generate(**context):
+                    fout.write(chunk)
+                    if rendered_hash is not None:
+                        encoded = chunk.encode("utf-8")
+                        rendered_hash.update(encoded)
+                        size += len(encoded)
+            if rendered_hash is not None:
+                self._record_output(
+                    template_path, outpath, context, rendered_hash.hexdigest(), size
+                )
+
+    def _get_template(self, template_path: str) -> "Template":
+        """Get a compiled template, reusing cached compilation where possible"""
+
+        if self.pack is not None:
+            code = self.pack.get_code(template_path)
+            if code is not None:
+                return self.env.template_class.from_code(
+                    self.env, code, self.env.make_globals(None), None
+                )
+
+        with self.sch_fs.open(template_path, "r") as fid:
+            source = fid.read()
+        return self.template_cache.get_template(
+            self.env,
+            source,
+            name=template_path,
+            filename=os.path.join(self.schematic_files_path, template_path),
+        )
 
     def copy_static_file(self, filename: str, context: Dict[str, Any]):
         from shutil import copy
@@ -158,11 +293,211 @@ class SchematicRenderer:
         rendered_outdir = os.path.join(rendered_outpath, outdir)
 
         if self.sch_fs.isfile(filename):
+            # Static contents do not depend upon the context, only their path does
+            if self._is_up_to_date(filename, outpath, context={}):
+                return
             self.copy_from_sch(filename, outpath)
+            if self.lock is not None:
+                from flaskerize.lockfile import hash_bytes
+
+                contents = self.sch_fs.readbytes(filename)
+                self._record_output(
+                    filename, outpath, {}, hash_bytes(contents), len(contents)
+                )
+
+    def _get_lock_key(self, outpath: str) -> str:
+        """Path of an output relative to the root of the source file system"""
+
+        return fs.path.relpath(
+            fs.path.normpath(fs.path.join(self.fs.output_prefix, outpath))
+        )
+
+    def _get_schematic_stamp(self) -> bytes:
+        """
+        Hash of the schematic's schema, run.py and custom_functions.py, which can
+        affect every output and so are folded into the source hash of each one
+        """
+
+        import json
+
+        from flaskerize.lockfile import hash_bytes
+
+        if self._schematic_stamp is None:
+            parts = [json.dumps(self.config, sort_keys=True).encode("utf-8")]
+            for filename in ("run.py", "custom_functions.py"):
+                path = os.path.join(self.schematic_path, filename)
+                if self.pack is not None:
+                    contents = self.pack.read_bytes(filename)
+                elif os.path.isfile(path):
+                    with open(path, "rb") as fid:
+                        contents = fid.read()
+                else:
+                    contents = None
+                parts.append(b"" if contents is None else hash_bytes(contents).encode())
+            self._schematic_stamp = hash_bytes(b"\0".join(parts)).encode("utf-8")
+        return self._schematic_stamp
+
+    def _hash_schematic_file(self, filename: str) -> str:
+        from flaskerize.lockfile import hash_bytes
+
+        source_hash = self._source_hashes.get(filename)
+        if source_hash is None:
+            source_hash = hash_bytes(
+                self._get_schematic_stamp() + self.sch_fs.readbytes(filename)
+            )
+            self._source_hashes[filename] = source_hash
+        return source_hash
+
+    def _is_up_to_date(self, filename: str, outpath: str, context: Dict) -> bool:
+        """
+        Check the lockfile, if any, for whether an output is up to date with its
+        schematic file and context, in which case it need not be rendered again
+        """
+
+        from flaskerize.lockfile import hash_context
+
+        if self.lock is None:
+            return False
+        lock_key = self._get_lock_key(outpath)
+        if self.lock.is_fresh(
+            self.fs.src_fs,
+            lock_key,
+            source_hash=self._hash_schematic_file(filename),
+            context_hash=hash_context(context),
+        ):
+            self.skipped_files.append(lock_key)
+            return True
+        return False
+
+    def _record_output(
+        self,
+        filename: str,
+        outpath: str,
+        context: Dict,
+        rendered_hash: str,
+        size: int,
+    ) -> None:
+        from flaskerize.lockfile import hash_context
+
+        self.lock.record(
+            self._get_lock_key(outpath),
+            source_hash=self._hash_schematic_file(filename),
+            context_hash=hash_context(context),
+            rendered_hash=rendered_hash,
+            size=size,
+        )
+
+    def map_files(
+        self,
+        func: Callable[..., None],
+        filenames: List[str],
+        context: Dict[str, Any],
+    ) -> None:
+        """
+        Apply `func` (such as render_from_file or copy_static_file) to each file.
+
+        If the renderer was configured with more than one job, files are processed
+        concurrently on a thread pool. All submitted work is allowed to finish and
+        the first error, in the order of `filenames`, is then raised so that error
+        reporting does not depend upon scheduling.
+        """
+
+        if self.jobs <= 1 or len(filenames) <= 1:
+            for filename in filenames:
+                func(filename, context=context)
+            return
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            futures = [
+                executor.submit(func, filename, context=context)
+                for filename in filenames
+            ]
+        for future in futures:
+            future.result()
+
+    def set_output_prefix(self, output_prefix: str) -> None:
+        """Render subsequent output relative to a new prefix in the same staging area"""
+
+        self.output_prefix = output_prefix
+        self.fs = self.fs.scoped(output_prefix)
+
+    def render_schematic(
+        self,
+        schematic: str,
+        name: str,
+        args: Optional[List[Any]] = None,
+        output_prefix: str = "",
+    ) -> "SchematicRenderer":
+        """
+        Render another schematic into this renderer's staging area, such as from a
+        run.py that composes several schematics. The sub-schematic shares the staged
+        file system, template cache and lockfile, and renders with an overlay of
+        this renderer's Jinja environment, so that the whole composition is diffed
+        and committed once, when the outermost render completes.
+
+        Args:
+            schematic (str): schematic to render, as for `fz generate`, i.e. a
+                'package_name:schematic' name, or a path to a schematic which if
+                relative is relative to this schematic's directory
+            name (str): name of the resource to render
+            args (List[Any], optional): arguments parsed according to the
+                sub-schematic's schema. Defaults to None, for no arguments.
+            output_prefix (str, optional): directory to render into, relative to
+                this renderer's output directory. Defaults to "".
+
+        Returns:
+            SchematicRenderer: the renderer of the sub-schematic
+        """
+
+        from flaskerize.pack import PACK_EXTENSION
+        from flaskerize.parser import Flaskerize, _is_pathlike
+
+        if _is_pathlike(schematic) and not os.path.isabs(schematic):
+            # Resolve against this schematic rather than the working directory, so
+            # that schematics shipped together can refer to each other
+            schematic_dirname = self.schematic_path
+            if self.pack is not None and schematic_dirname.endswith(PACK_EXTENSION):
+                schematic_dirname = schematic_dirname[: -len(PACK_EXTENSION)]
+            schematic = os.path.abspath(os.path.join(schematic_dirname, schematic))
+        if _is_pathlike(schematic) and ":" not in schematic:
+            # A path to the schematic directory or pack itself, rather than a name
+            schematic_path = Flaskerize()._check_get_schematic_path(
+                os.path.dirname(schematic), os.path.basename(schematic)
+            )
+        else:
+            schematic_path = Flaskerize()._check_get_schematic_path_from_name(schematic)
+        sub_prefix = fs.path.join(self.output_prefix, output_prefix)
+        renderer = self._sub_renderers.get(schematic_path)
+        if renderer is None:
+            env = self.env.overlay()
+            # Keep the sub-schematic's custom functions out of this environment
+            env.globals = dict(self.env.globals)
+            renderer = SchematicRenderer(
+                schematic_path,
+                src_path=self.src_path,
+                output_prefix=sub_prefix,
+                dry_run=self.dry_run,
+                template_cache=self.template_cache,
+                jobs=self.jobs,
+                staged_fs=self.fs,
+                quiet=True,
+                lock=self.lock,
+                env=env,
+            )
+            renderer.skipped_files = self.skipped_files
+            self._sub_renderers[schematic_path] = renderer
+        else:
+            renderer.set_output_prefix(sub_prefix)
+        renderer.render(name, args or [], commit=False)
+        return renderer
 
     def print_summary(self):
         """Print summary of operations performed"""
 
+        if self.quiet:
+            return
         print(
             f"""
 Flaskerize job summary:
@@ -171,15 +506,32 @@ Flaskerize job summary:
         Full schematic path: {colored(self.schematic_path, "yellow")}
         """
         )
+        if self.lock is not None:
+            print(f"        {len(self.skipped_files)} file(s) skipped as up to date")
         self.fs.print_fs_diff()
 
-    def _load_run_function(self, path: str) -> Callable:
+    def _exec_module(self, name: str, path: str) -> ModuleType:
+        """Execute a Python module provided by the schematic, such as run.py"""
+
         from importlib.util import spec_from_file_location, module_from_spec
 
-        spec = spec_from_file_location("run", path)
+        if self.pack is not None:
+            return self.pack.load_module(
+                name, os.path.relpath(path, self.schematic_path)
+            )
+        spec = spec_from_file_location(name, path)
 
         module = module_from_spec(spec)
         spec.loader.exec_module(module)
+        return module
+
+    def _schematic_file_exists(self, path: str) -> bool:
+        if self.pack is not None:
+            return self.pack.exists(os.path.relpath(path, self.schematic_path))
+        return os.path.exists(path)
+
+    def _load_run_function(self, path: str) -> Callable:
+        module = self._exec_module("run", path)
         if not hasattr(module, "run"):
             raise ValueError(f"No method 'run' function found in {path}")
         return getattr(module, "run")
@@ -188,20 +540,42 @@ Flaskerize job summary:
         import os
 
         from flaskerize import registered_funcs
-        from importlib.util import spec_from_file_location, module_from_spec
+        from flaskerize.custom_functions import load_schematic_custom_functions
 
-        if not os.path.exists(path):
+        if not self._schematic_file_exists(path):
             return
-        spec = spec_from_file_location("custom_functions", path)
-
-        module = module_from_spec(spec)
-        spec.loader.exec_module(module)
+        schematic_funcs = load_schematic_custom_functions(
+            self._get_module_cache_key(path),
+            lambda: self._exec_module("custom_functions", path),
+        )
 
-        for f in registered_funcs:
+        # Functions registered outside of any schematic remain available to all
+        for f in list(registered_funcs) + schematic_funcs:
             self.env.globals[f.__name__] = f
 
-    def render(self, name: str, args: List[Any]) -> None:
-        """Renders the schematic"""
+    def _get_module_cache_key(self, path: str) -> Tuple[str, int, int]:
+        """Key identifying the current version of a schematic module on disk"""
+
+        stat = os.stat(self.pack.path if self.pack is not None else path)
+        return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+    def render(
+        self, name: str, args: List[Any], commit: bool = True
+    ) -> Optional["GenerationReport"]:
+        """
+        Renders the schematic
+
+        Args:
+            name (str): name of the resource to render
+            args (List[Any]): arguments parsed according to the schematic's schema
+            commit (bool, optional): commit the staged changes once rendering is
+                complete. Disable to batch several renders into a single commit.
+                Defaults to True.
+
+        Returns:
+            Optional[GenerationReport]: report of the committed changes and time spent
+                per phase, or None if commit is False
+        """
 
         context = vars(self.arg_parser.parse_args(args))
         if "name" in context:
@@ -212,17 +586,28 @@ Flaskerize job summary:
             )
         context = {**context, "name": name}
 
-        self._load_custom_functions(
-            path=os.path.join(self.schematic_path, "custom_functions.py")
-        )
-        try:
-            run = self._load_run_function(
-                path=os.path.join(self.schematic_path, "run.py")
-            )
-        except (ImportError, ValueError, FileNotFoundError) as e:
-            run = default_run
-        run(renderer=self, context=context)
+        if self._run is None:
+            # Schematic modules are loaded once and reused by later renders
+            with self.fs.timer.phase("custom_functions"):
+                self._load_custom_functions(
+                    path=os.path.join(self.schematic_path, "custom_functions.py")
+                )
+                try:
+                    self._run = self._load_run_function(
+                        path=os.path.join(self.schematic_path, "run.py")
+                    )
+                except (ImportError, ValueError, FileNotFoundError) as e:
+                    self._run = default_run
+        with self.fs.timer.phase("render"):
+            if self.lock is not None:
+                self.lock.load(self.fs.src_fs)
+            self._run(renderer=self, context=context)
+            if self.lock is not None:
+                self.lock.save(self.fs)
+        if not commit:
+            return None
         self.fs.commit()
+        return self.fs.report()
 
 
 def default_run(renderer: SchematicRenderer, context: Dict[str, Any]) -> None:
@@ -233,8 +618,85 @@ def default_run(renderer: SchematicRenderer, context: Dict[str, Any]) -> None:
 
     # TODO: add test that static files are correctly removed from template_files, etc
 
-    for filename in template_files:
-        renderer.render_from_file(filename, context=context)
-    for filename in static_files:
-        renderer.copy_static_file(filename, context=context)
+    renderer.map_files(renderer.render_from_file, template_files, context=context)
+    renderer.map_files(renderer.copy_static_file, static_files, context=context)
     renderer.print_summary()
+
+
+def render_in_memory(
+    schematic_path: str,
+    name: str,
+    args: Optional[List[Any]] = None,
+    output_prefix: str = "",
+    files: Optional[Dict[str, Union[str, bytes]]] = None,
+    src_path: Optional[str] = None,
+    template_cache: Optional["TemplateCache"] = None,
+) -> Dict[str, RenderedFile]:
+    """
+    Render a schematic into a staging area in memory, without writing to disk or
+    printing a summary
+
+    Args:
+        schematic_path (str): path to the schematic directory or pack, which if
+            relative is relative to the working directory
+        name (str): name of the resource to render
+        args (List[Any], optional): arguments parsed according to the schematic's
+            schema. Defaults to None, for no arguments.
+        output_prefix (str, optional): directory to render into, relative to the
+            project root. Defaults to "".
+        files (Dict[str, Union[str, bytes]], optional): contents of the project
+            being rendered into, by path, held in memory. Defaults to None, for an
+            empty project.
+        src_path (str, optional): directory of an existing project to render
+            into instead of `files`. It is read from but never written to.
+            Defaults to None.
+        template_cache (TemplateCache, optional): cache of compiled templates.
+            Defaults to None, which uses the in-memory default cache.
+
+    Returns:
+        Dict[str, RenderedFile]: each staged or deleted file, keyed by its path
+            relative to the project root
+    """
+
+    from flaskerize.fileio import StagedFileSystem
+
+    if files is not None and src_path is not None:
+        raise ValueError("Provide at most one of files and src_path")
+    schematic_path = os.path.abspath(schematic_path)
+    if src_path is not None:
+        src_fs = fs.open_fs(src_path)
+    else:
+        src_fs = fs.open_fs("mem://")
+        for path, content in (files or {}).items():
+            src_fs.makedirs(fs.path.dirname(path), recreate=True)
+            if isinstance(content, str):
+                content = content.encode("utf-8")
+            src_fs.writebytes(path, content)
+
+    staged_fs = StagedFileSystem(
+        src_path=src_path or "", src_fs_factory=lambda _: src_fs, dry_run=True
+    )
+    SchematicRenderer(
+        schematic_path,
+        src_path=src_path or ".",
+        output_prefix=output_prefix,
+        dry_run=True,
+        template_cache=template_cache,
+        staged_fs=staged_fs,
+        quiet=True,
+    ).render(name, args or [], commit=False)
+
+    diff = staged_fs.diff()
+    rendered: Dict[str, RenderedFile] = {}
+    for status, paths in (
+        ("created", diff.created_files),
+        ("modified", diff.modified_files),
+        ("unchanged", diff.unchanged_files),
+    ):
+        for path in paths:
+            rendered[fs.path.relpath(path)] = RenderedFile(
+                status, staged_fs.stg_fs.readbytes(path)
+            )
+    for path in diff.deleted_files:
+        rendered[fs.path.relpath(fs.path.abspath(path))] = RenderedFile("deleted", None)
+    return rendered
@@ -4,7 +4,7 @@ from os import path
 from unittest.mock import patch, MagicMock
 from typing import Callable
 
-from .render import SchematicRenderer
+from .render import SchematicRenderer, render_in_memory
 
 
 @fixture
@@ -617,3 +617,234 @@ def truncate(val: str, max_length: int) -> str:
 #     full_output_path = os.path.join(src_path, "my_file.txt")
 
 #     assert os.path.exists(full_output_path)
+
+
+def test_default_run_with_multiple_jobs_renders_all_files(tmp_path):
+    from flaskerize.render import default_run
+
+    schematic_path = path.join(tmp_path, "schematics/doodad/")
+    schematic_files_path = path.join(schematic_path, "files/")
+    os.makedirs(path.join(schematic_files_path, "nested/"))
+    for i in range(10):
+        template_path = path.join(schematic_files_path, f"nested/f{i}.txt.template")
+        with open(template_path, "w") as fid:
+            fid.write(f"{{{{ name }}}} {i}")
+        with open(path.join(schematic_files_path, f"nested/s{i}.txt"), "w") as fid:
+            fid.write(f"static {i}")
+    renderer = SchematicRenderer(
+        schematic_path=schematic_path,
+        src_path=path.join(tmp_path, "results/"),
+        dry_run=True,
+        jobs=4,
+    )
+
+    default_run(renderer=renderer, context={"name": "doodad"})
+
+    assert len(renderer.fs.get_created_files()) == 20
+    with renderer.fs.open("nested/f3.txt") as fid:
+        assert fid.read() == "doodad 3"
+
+
+def test_map_files_raises_first_error_in_order(renderer):
+    def func(filename, context):
+        if filename in ("b", "d"):
+            raise ValueError(filename)
+
+    renderer.jobs = 4
+    with raises(ValueError, match="b"):
+        renderer.map_files(func, ["a", "b", "c", "d"], context={})
+
+
+def test_render_from_file_streams_output(renderer):
+    from jinja2 import Template
+
+    filename = os.path.join(renderer.schematic_files_path, "seed.txt.template")
+    with open(filename, "w") as fid:
+        fid.write("{% for i in range(n) %}row {{ i }}\n{% endfor %}")
+
+    with patch.object(
+        Template, "generate", autospec=True, side_effect=Template.generate
+    ) as mock:
+        renderer.render_from_file("seed.txt.template", context={"n": 1000})
+
+    mock.assert_called_once()
+    with renderer.fs.open("seed.txt") as fid:
+        lines = fid.read().splitlines()
+    assert len(lines) == 1000
+    assert lines[-1] == "row 999"
+
+
+def test__generate_outfile_returns_literal_paths_without_compiling(renderer):
+    with patch.object(renderer.env, "from_string") as mock:
+        outfile = renderer._generate_outfile(
+            template_file="my/file.txt.template", root="/base"
+        )
+
+    mock.assert_not_called()
+    assert outfile == "my/file.txt"
+
+
+def test__generate_outfile_compiles_templated_paths_once(renderer):
+    with patch.object(
+        renderer.env, "from_string", wraps=renderer.env.from_string
+    ) as mock:
+        first = renderer._generate_outfile(
+            "{{ name }}/file.txt.template", root="/base", context={"name": "a"}
+        )
+        second = renderer._generate_outfile(
+            "{{ name }}/file.txt.template", root="/base", context={"name": "b"}
+        )
+
+    mock.assert_called_once()
+    assert first == "a/file.txt"
+    assert second == "b/file.txt"
+
+
+@fixture
+def greeting_schematic_path(make_schematic):
+    return make_schematic(static=True)
+
+
+def test_render_in_memory_returns_contents_and_status(greeting_schematic_path):
+    rendered = render_in_memory(
+        greeting_schematic_path,
+        "thing",
+        args=["Hello"],
+        output_prefix="out",
+        files={"out/static.txt": "static", "out/thing.txt": "Bye thing!"},
+    )
+
+    assert rendered == {
+        "out/thing.txt": ("modified", b"Hello thing!"),
+        "out/static.txt": ("unchanged", b"static"),
+    }
+    assert rendered["out/thing.txt"].text == "Hello thing!"
+
+
+def test_render_in_memory_does_not_write_or_print(
+    greeting_schematic_path, tmp_path, capsys
+):
+    src_path = path.join(tmp_path, "project")
+    os.makedirs(src_path)
+
+    rendered = render_in_memory(
+        greeting_schematic_path, "thing", args=["Hi"], src_path=src_path
+    )
+
+    assert rendered["thing.txt"].status == "created"
+    assert os.listdir(src_path) == []
+    assert capsys.readouterr().out == ""
+
+
+def test_render_in_memory_resolves_relative_schematic_path(
+    greeting_schematic_path, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(path.dirname(greeting_schematic_path))
+
+    rendered = render_in_memory(
+        path.join(".", path.basename(greeting_schematic_path)), "thing", ["Hello"]
+    )
+
+    assert rendered["thing.txt"].text == "Hello thing!"
+
+
+def test_render_in_memory_raises_with_files_and_src_path(
+    greeting_schematic_path, tmp_path
+):
+    with raises(ValueError):
+        render_in_memory(
+            greeting_schematic_path, "thing", files={}, src_path=str(tmp_path)
+        )
+
+
+@fixture
+def sub_schematic_path(make_schematic):
+    # Kept apart from schematics/doodad, which the renderer fixture also writes
+    return make_schematic("greeting", static=True)
+
+
+@fixture
+def composed_schematic_path(tmp_path, sub_schematic_path):
+    schematic_path = path.join(tmp_path, "schematics/composite")
+    os.makedirs(path.join(schematic_path, "files"))
+    with open(path.join(schematic_path, "schema.json"), "w") as fid:
+        fid.write('{"options": [{"arg": "models", "type": "str", "nargs": "+"}]}')
+    with open(path.join(schematic_path, "files", "index.txt.template"), "w") as fid:
+        fid.write("{{ models|join(',') }}")
+    with open(path.join(schematic_path, "run.py"), "w") as fid:
+        fid.write(
+            """
+from flaskerize.render import default_run
+
+
+def run(renderer, context):
+    for model in context["models"]:
+        renderer.render_schematic(
+            "../greeting", model, ["Hello"], output_prefix="models"
+        )
+    default_run(renderer, context)
+"""
+        )
+    return schematic_path
+
+
+def test_render_schematic_composes_into_one_commit(composed_schematic_path, tmp_path):
+    from .fileio import StagedFileSystem
+
+    src_path = path.join(tmp_path, "results")
+    renderer = SchematicRenderer(
+        composed_schematic_path,
+        src_path=src_path,
+        output_prefix="app",
+        quiet=True,
+    )
+    with patch.object(
+        StagedFileSystem, "commit", autospec=True, side_effect=StagedFileSystem.commit
+    ) as mock_commit:
+        report = renderer.render("project", ["a", "b"])
+
+    mock_commit.assert_called_once()
+    assert sorted(report.diff.created_files) == [
+        "/app/index.txt",
+        "/app/models/a.txt",
+        "/app/models/b.txt",
+        "/app/models/static.txt",
+    ]
+    with open(path.join(src_path, "app/models/b.txt")) as fid:
+        assert fid.read() == "Hello b!"
+    with open(path.join(src_path, "app/index.txt")) as fid:
+        assert fid.read() == "a,b"
+
+
+def test_render_schematic_resolves_relative_to_relative_parent(
+    composed_schematic_path, tmp_path, monkeypatch
+):
+    from .parser import Flaskerize
+
+    monkeypatch.chdir(tmp_path)
+
+    Flaskerize(["fz", "generate", "./schematics:composite", "out/thing", "a"])
+
+    with open(path.join(tmp_path, "out/models/a.txt")) as fid:
+        assert fid.read() == "Hello a!"
+    with open(path.join(tmp_path, "out/index.txt")) as fid:
+        assert fid.read() == "a"
+
+
+def test_render_schematic_reuses_sub_renderer_and_shares_state(
+    renderer, sub_schematic_path
+):
+    renderer.env.globals["shout"] = str.upper
+
+    first = renderer.render_schematic(sub_schematic_path, "a", ["Hi"])
+    second = renderer.render_schematic(
+        sub_schematic_path, "b", ["Hi"], output_prefix="sub"
+    )
+
+    assert first is second
+    assert first.template_cache is renderer.template_cache
+    assert first.fs.stg_fs is renderer.fs.stg_fs
+    assert first.env.globals["shout"] is str.upper
+    assert first.env.globals is not renderer.env.globals
+    assert renderer.fs.render_fs.readtext("a.txt") == "Hi a!"
+    assert renderer.fs.render_fs.readtext("sub/b.txt") == "Hi b!"
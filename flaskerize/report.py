@@ -0,0 +1,84 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from flaskerize.fileio import FsDiff
+
+# Phases of a generation, in the order in which they are reported
+PHASES = ("schema_load", "custom_functions", "discovery", "render", "diff", "commit")
+
+
+class PhaseTimer:
+    """
+    Accumulates wall-clock time per phase. Phases may nest, in which case time spent
+    in the inner phase is attributed to it alone and not to the enclosing phase.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {phase: 0.0 for phase in PHASES}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        stack = self._local.__dict__.setdefault("stack", [])
+        # Each frame holds [start time, time spent in nested phases]
+        frame = [time.perf_counter(), 0.0]
+        stack.append(frame)
+        try:
+            yield
+        finally:
+            stack.pop()
+            elapsed = time.perf_counter() - frame[0]
+            with self._lock:
+                self.timings[name] = self.timings.get(name, 0.0) + elapsed - frame[1]
+            if stack:
+                stack[-1][1] += elapsed
+
+
+class GenerationReport(NamedTuple):
+    """
+    Machine-readable result of a generation: the diff that was (or, for a dry run,
+    would have been) committed, the size in bytes of every path in it and the time
+    spent in each phase
+    """
+
+    diff: "FsDiff"
+    sizes: Dict[str, int]
+    timings: Dict[str, float]
+    dry_run: bool
+
+    def to_dict(self) -> Dict[str, Any]:
+        import fs.path
+
+        def _files(paths: List[str]) -> List[Dict[str, Any]]:
+            return [
+                {"path": fs.path.relpath(p), "bytes": self.sizes.get(p, 0)}
+                for p in paths
+            ]
+
+        groups = {
+            "created": self.diff.created_files,
+            "modified": self.diff.modified_files,
+            "deleted": self.diff.deleted_files,
+            "unchanged": self.diff.unchanged_files,
+        }
+        return {
+            "dry_run": self.dry_run,
+            "created_directories": [
+                fs.path.relpath(p) for p in self.diff.created_directories
+            ],
+            **{f"{group}_files": _files(paths) for group, paths in groups.items()},
+            "bytes": {
+                group: sum(self.sizes.get(p, 0) for p in paths)
+                for group, paths in groups.items()
+            },
+            "timings": dict(self.timings),
+        }
+
+    def to_json(self) -> str:
+        import json
+
+        return json.dumps(self.to_dict(), indent=2)
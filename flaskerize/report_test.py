@@ -0,0 +1,50 @@
+import json
+import os
+import time
+from os import path
+
+from .report import PHASES, PhaseTimer
+
+
+def test_phase_timer_reports_every_phase():
+    timer = PhaseTimer()
+
+    assert list(timer.timings) == list(PHASES)
+    assert all(value == 0.0 for value in timer.timings.values())
+
+
+def test_phase_timer_excludes_nested_phases():
+    timer = PhaseTimer()
+
+    with timer.phase("render"):
+        with timer.phase("diff"):
+            time.sleep(0.05)
+
+    assert timer.timings["diff"] >= 0.05
+    assert timer.timings["render"] < 0.05
+
+
+def test_render_returns_report(tmp_path):
+    from .render import SchematicRenderer
+
+    schematic_path = path.join(tmp_path, "schematics/doodad")
+    files_path = path.join(schematic_path, "files")
+    os.makedirs(files_path)
+    with open(path.join(files_path, "{{ name }}.txt.template"), "w") as fid:
+        fid.write("Hello {{ name }}!")
+    src_path = path.join(tmp_path, "results")
+
+    report = SchematicRenderer(schematic_path, src_path=src_path, quiet=True).render(
+        "widget", []
+    )
+    result = json.loads(report.to_json())
+
+    assert result["dry_run"] is False
+    assert result["created_files"] == [
+        {"path": "widget.txt", "bytes": len("Hello widget!")}
+    ]
+    assert result["bytes"]["created"] == len("Hello widget!")
+    assert result["modified_files"] == []
+    assert set(result["timings"]) == set(PHASES)
+    assert result["timings"]["render"] > 0
+    assert result["timings"]["commit"] > 0
@@ -0,0 +1,274 @@
+import json
+import os
+import socket
+import sys
+from typing import Any, Dict, List, Optional
+
+# Commands that a running `fz serve` daemon handles on behalf of the client
+FORWARDED_COMMANDS = ("attach", "bundle", "generate")
+
+# Set to any non-empty value to always run commands in the invoking process
+NO_DAEMON_ENV_VAR = "FLASKERIZE_NO_DAEMON"
+SOCKET_ENV_VAR = "FLASKERIZE_SOCKET"
+
+# Seconds to wait for a daemon to accept a connection, beyond which it is assumed
+# to be hung and the command is run in this process instead
+CONNECT_TIMEOUT = 1.0
+# Seconds to wait for a daemon to run a command. A command cannot be rerun in this
+# process once it has been sent, as the daemon may have partially run it.
+RESPONSE_TIMEOUT = 600.0
+# Seconds the daemon waits for a client to send its request, so that a client that
+# connects and stalls cannot block it
+REQUEST_TIMEOUT = 10.0
+
+
+def get_socket_name() -> str:
+    """
+    Get the file name of the daemon's Unix socket. The name is unique to this
+    Python environment and flaskerize install, so that clients never hand commands
+    to a daemon running a different interpreter or copy of flaskerize. The install
+    is identified by its location and the modification time of this module, which
+    changes when flaskerize is upgraded or reinstalled, rather than by looking up
+    the package version, which would slow down every command.
+    """
+
+    from hashlib import sha1
+
+    key = "\0".join(
+        [
+            sys.prefix,
+            sys.executable,
+            os.path.dirname(os.path.abspath(__file__)),
+            str(os.stat(__file__).st_mtime_ns),
+        ]
+    )
+    return f"flaskerize-{sha1(key.encode('utf-8')).hexdigest()[:16]}.sock"
+
+
+def default_socket_path() -> str:
+    """
+    Get the path of the daemon's Unix socket. Honors FLASKERIZE_SOCKET, and
+    otherwise prefers XDG_RUNTIME_DIR over the flaskerize cache directory.
+    """
+
+    from flaskerize.utils import default_cache_dir
+
+    if os.environ.get(SOCKET_ENV_VAR):
+        return os.environ[SOCKET_ENV_VAR]
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return os.path.join(os.environ["XDG_RUNTIME_DIR"], get_socket_name())
+    return default_cache_dir(get_socket_name())
+
+
+def _recv_line(sock: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b"\n"):
+            break
+    return b"".join(chunks)
+
+
+def forward_to_daemon(
+    argv: List[str], socket_path: Optional[str] = None
+) -> Optional[int]:
+    """
+    Run a command in a running `fz serve` daemon, if there is one, writing its
+    output to this process's stdout and stderr.
+
+    Returns:
+        Optional[int]: exit code of the command, or None if it was not forwarded
+            and should be run in this process instead
+    """
+
+    if (
+        os.environ.get(NO_DAEMON_ENV_VAR)
+        or not hasattr(socket, "AF_UNIX")
+        or len(argv) < 2
+        or argv[1] not in FORWARDED_COMMANDS
+    ):
+        return None
+    socket_path = socket_path or default_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+
+    from flaskerize.utils import get_umask
+
+    request = {
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "env": dict(os.environ),
+        "umask": get_umask(),
+    }
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(socket_path)
+        except OSError:
+            # No daemon is listening, such as after it was killed
+            return None
+        try:
+            sock.settimeout(RESPONSE_TIMEOUT)
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            response = json.loads(_recv_line(sock).decode("utf-8"))
+        except (OSError, ValueError) as e:
+            print(
+                f"fz serve at {socket_path} did not respond ({e or type(e).__name__});"
+                " the command may have partially run",
+                file=sys.stderr,
+            )
+            return 1
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["exit_code"]
+
+
+def run_request(
+    argv: List[str],
+    cwd: str,
+    env: Optional[Dict[str, str]] = None,
+    umask: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Run a CLI command in this process, from the given working directory, capturing
+    its output and exit code
+
+    Args:
+        argv (List[str]): command line arguments, including the program name
+        cwd (str): working directory to run the command from
+        env (Dict[str, str], optional): environment variables to run the command
+            with, e.g. those of the client. Defaults to None, for this process's.
+        umask (int, optional): umask to run the command with. Defaults to None, for
+            this process's.
+    """
+
+    import io
+    import traceback
+    from contextlib import redirect_stderr, redirect_stdout
+
+    from flaskerize.parser import Flaskerize
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    exit_code = 0
+    previous_cwd = os.getcwd()
+    previous_env = dict(os.environ)
+    previous_umask = os.umask(umask) if umask is not None else None
+    try:
+        if env is not None:
+            os.environ.clear()
+            os.environ.update(env)
+        os.chdir(cwd)
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                Flaskerize(argv)
+            except SystemExit as e:
+                if e.code is None or isinstance(e.code, int):
+                    exit_code = e.code or 0
+                else:
+                    print(e.code, file=sys.stderr)
+                    exit_code = 1
+            except Exception:
+                traceback.print_exc()
+                exit_code = 1
+    finally:
+        os.chdir(previous_cwd)
+        if env is not None:
+            os.environ.clear()
+            os.environ.update(previous_env)
+        if previous_umask is not None:
+            os.umask(previous_umask)
+    return {
+        "exit_code": exit_code,
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+    }
+
+
+def make_server(socket_path: str):
+    """
+    Create a server listening on a Unix socket. Requests are handled one at a time,
+    as each one changes the working directory, environment and umask and redirects
+    stdout of this process.
+    """
+
+    import socketserver
+
+    from flaskerize.exceptions import DaemonAlreadyRunning
+
+    class RequestHandler(socketserver.StreamRequestHandler):
+        timeout = REQUEST_TIMEOUT
+
+        def handle(self) -> None:
+            try:
+                request = json.loads(self.rfile.readline().decode("utf-8"))
+                argv, cwd = list(request["argv"]), request["cwd"]
+            except (OSError, ValueError, KeyError, TypeError):
+                # Not a request, such as from a client that only probes whether a
+                # daemon is listening, or one that stalled or disconnected
+                return
+            if len(argv) < 2 or argv[1] not in FORWARDED_COMMANDS:
+                response = {
+                    "exit_code": 2,
+                    "stdout": "",
+                    "stderr": f"fz serve does not handle '{' '.join(argv[1:2])}'\n",
+                }
+            else:
+                response = run_request(
+                    argv, cwd, request.get("env"), request.get("umask")
+                )
+            try:
+                self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            except OSError:
+                # The client gave up waiting, and reports the failure itself
+                pass
+
+    if os.path.exists(socket_path):
+        if _is_listening(socket_path):
+            raise DaemonAlreadyRunning(
+                f"A daemon is already listening on {socket_path}"
+            )
+        # Left behind by a daemon that did not shut down cleanly
+        os.remove(socket_path)
+    dirname = os.path.dirname(socket_path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    # Only the current user may connect
+    umask = os.umask(0o177)
+    try:
+        return socketserver.UnixStreamServer(socket_path, RequestHandler)
+    finally:
+        os.umask(umask)
+
+
+def _is_listening(socket_path: str) -> bool:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+    except OSError:
+        return False
+    return True
+
+
+def serve(socket_path: Optional[str] = None) -> None:
+    """Serve CLI requests on a Unix socket until interrupted or terminated"""
+
+    import signal
+
+    from termcolor import colored
+
+    socket_path = socket_path or default_socket_path()
+    server = make_server(socket_path)
+    # Remove the socket on `kill` as well as on Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"{colored('Serving', 'green')} flaskerize on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
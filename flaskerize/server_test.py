@@ -0,0 +1,232 @@
+import os
+import socket
+import sys
+import tempfile
+import threading
+from os import path
+from unittest.mock import patch
+
+import pytest
+
+from .exceptions import DaemonAlreadyRunning
+from .server import (
+    NO_DAEMON_ENV_VAR,
+    SOCKET_ENV_VAR,
+    default_socket_path,
+    forward_to_daemon,
+    get_socket_name,
+    make_server,
+    run_request,
+)
+
+
+@pytest.fixture
+def socket_path():
+    # Unix socket paths are limited to ~100 characters, which tmp_path can exceed
+    dirname = tempfile.mkdtemp()
+    yield path.join(dirname, "fz.sock")
+    if path.exists(path.join(dirname, "fz.sock")):
+        os.remove(path.join(dirname, "fz.sock"))
+    os.rmdir(dirname)
+
+
+@pytest.fixture
+def server(socket_path):
+    server = make_server(socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_default_socket_path_honors_env_var():
+    with patch.dict(os.environ, {SOCKET_ENV_VAR: "/tmp/custom.sock"}):
+        assert default_socket_path() == "/tmp/custom.sock"
+
+
+def test_default_socket_path_is_unique_to_environment():
+    with patch.dict(os.environ, {SOCKET_ENV_VAR: "", "XDG_RUNTIME_DIR": "/run/u"}):
+        default = default_socket_path()
+        with patch.object(sys, "prefix", "/other/venv"):
+            other = default_socket_path()
+
+    assert path.dirname(default) == "/run/u"
+    assert path.basename(default) == get_socket_name()
+    assert default != other
+
+
+def test_run_request_applies_and_restores_env_and_umask(tmp_path):
+    seen = []
+    umask = os.umask(0o022)
+    try:
+        with patch.dict(os.environ, {"FZ_TEST_SERVER": "daemon"}):
+            env = {**os.environ, "FZ_TEST_SERVER": "client"}
+            with patch("flaskerize.parser.Flaskerize") as Flaskerize:
+                Flaskerize.side_effect = lambda argv: seen.append(
+                    (os.environ["FZ_TEST_SERVER"], os.umask(0o022))
+                )
+                response = run_request(["fz", "generate"], str(tmp_path), env, 0o077)
+
+            assert os.environ["FZ_TEST_SERVER"] == "daemon"
+        assert os.umask(0o022) == 0o022
+    finally:
+        os.umask(umask)
+
+    assert response["exit_code"] == 0
+    assert seen == [("client", 0o077)]
+
+
+def test_forward_to_daemon_uses_client_umask(
+    server, socket_path, schematic_path, tmp_path
+):
+    outdir = path.join(tmp_path, "out")
+    os.makedirs(outdir)
+    cwd = os.getcwd()
+    umask = os.umask(0o077)
+    try:
+        os.chdir(outdir)
+        exit_code = forward_to_daemon(
+            ["fz", "generate", schematic_path, "thing", "Hello"], socket_path
+        )
+    finally:
+        os.umask(umask)
+        os.chdir(cwd)
+
+    assert exit_code == 0
+    assert os.stat(path.join(outdir, "thing.txt")).st_mode & 0o777 == 0o600
+
+
+def test_forward_to_daemon_fails_if_daemon_drops_request(socket_path, capsys):
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(1)
+
+    def drop():
+        conn, _ = listener.accept()
+        with conn:
+            conn.makefile("rb").readline()
+
+    thread = threading.Thread(target=drop, daemon=True)
+    thread.start()
+    try:
+        exit_code = forward_to_daemon(["fz", "generate", "x", "y"], socket_path)
+    finally:
+        thread.join()
+        listener.close()
+
+    assert exit_code == 1
+    assert "did not respond" in capsys.readouterr().err
+
+
+def test_forward_to_daemon_runs_generate_in_daemon(
+    server, socket_path, schematic_path, tmp_path, capsys
+):
+    outdir = path.join(tmp_path, "out")
+    os.makedirs(outdir)
+    cwd = os.getcwd()
+    try:
+        os.chdir(outdir)
+        exit_code = forward_to_daemon(
+            ["fz", "generate", schematic_path, "thing", "Hello"], socket_path
+        )
+    finally:
+        os.chdir(cwd)
+
+    assert exit_code == 0
+    with open(path.join(outdir, "thing.txt")) as fid:
+        assert fid.read() == "Hello thing!"
+    assert "thing.txt" in capsys.readouterr().out
+
+
+def test_forward_to_daemon_reports_failures(server, socket_path, capsys):
+    exit_code = forward_to_daemon(["fz", "generate", "does/not/exist"], socket_path)
+
+    assert exit_code not in (None, 0)
+    assert capsys.readouterr().err
+
+
+def test_forward_to_daemon_skips_commands_that_are_not_forwarded(server, socket_path):
+    assert forward_to_daemon(["fz", "serve"], socket_path) is None
+    assert forward_to_daemon(["fz", "list"], socket_path) is None
+    assert forward_to_daemon(["fz"], socket_path) is None
+
+
+def test_forward_to_daemon_skips_when_disabled(server, socket_path):
+    with patch.dict(os.environ, {NO_DAEMON_ENV_VAR: "1"}):
+        assert forward_to_daemon(["fz", "generate", "x", "y"], socket_path) is None
+
+
+def test_forward_to_daemon_returns_none_without_daemon(socket_path):
+    assert forward_to_daemon(["fz", "generate", "x", "y"], socket_path) is None
+
+
+def test_forward_to_daemon_returns_none_for_stale_socket(socket_path):
+    make_server(socket_path).server_close()
+    assert path.exists(socket_path)
+
+    assert forward_to_daemon(["fz", "generate", "x", "y"], socket_path) is None
+
+
+def test_make_server_replaces_stale_socket(socket_path):
+    make_server(socket_path).server_close()
+
+    server = make_server(socket_path)
+    server.server_close()
+
+
+def test_make_server_raises_if_daemon_is_running(server, socket_path):
+    with pytest.raises(DaemonAlreadyRunning):
+        make_server(socket_path)
+
+
+def test_fz_serve_reports_running_daemon(server, socket_path, capsys):
+    from .parser import Flaskerize
+
+    with pytest.raises(SystemExit) as excinfo:
+        Flaskerize(["fz", "serve", "--socket", socket_path])
+
+    assert excinfo.value.code == 1
+    assert capsys.readouterr().err == (
+        f"A daemon is already listening on {socket_path}\n"
+    )
+
+
+def test_server_ignores_connections_without_request(
+    server, socket_path, schematic_path, tmp_path, capsys
+):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(b"not json\n")
+        assert sock.recv(1) == b""
+
+    exit_code = forward_to_daemon(
+        ["fz", "generate", schematic_path, "thing", "Hello", "--dry-run"], socket_path
+    )
+
+    assert exit_code == 0
+    assert "Traceback" not in capsys.readouterr().err
+
+
+def test_server_times_out_stalled_clients(socket_path, schematic_path):
+    with patch("flaskerize.server.REQUEST_TIMEOUT", 0.1):
+        server = make_server(socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stalled:
+            stalled.connect(socket_path)
+            with patch("flaskerize.server.RESPONSE_TIMEOUT", 5.0):
+                exit_code = forward_to_daemon(
+                    ["fz", "generate", schematic_path, "thing", "Hello", "--dry-run"],
+                    socket_path,
+                )
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+    assert exit_code == 0
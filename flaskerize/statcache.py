@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+STAT_CACHE_VERSION = 1
+
+
+def get_stat_cache_path(project_path: str) -> str:
+    """
+    Get the path of the stat cache for a project. Caches are kept in the user cache
+    directory, keyed by the real path of the project, so that nothing is written
+    into the project itself.
+    """
+
+    import hashlib
+
+    from flaskerize.utils import default_cache_dir
+
+    key = hashlib.sha1(os.path.realpath(project_path).encode("utf-8")).hexdigest()
+    return default_cache_dir("stat", f"{key}.json")
+
+
+def file_digest(fhandle_getter) -> str:
+    import hashlib
+
+    digest = hashlib.blake2b(digest_size=16)
+    with fhandle_getter() as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StatCache:
+    """
+    Persistent map from a project path to its size, mtime and content digest, so that
+    files whose stat data is unchanged since they were last hashed need not be read.
+
+    As with git's index, an entry is only trusted if the file was last modified
+    before the cache was saved. A file modified within the same clock tick as the
+    save could otherwise change without its size or mtime doing so.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Optional[Dict[str, List]] = None
+        self._saved_ns = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, List]:
+        import json
+
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.path, "r") as fid:
+                    data = json.load(fid)
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == STAT_CACHE_VERSION:
+                self._entries = data.get("entries", {})
+                self._saved_ns = data.get("saved_ns", 0)
+        return self._entries
+
+    def get(self, path: str, size: int, mtime_ns: int) -> Optional[str]:
+        """Get the stored digest of a file, if its stat data is unchanged"""
+
+        with self._lock:
+            entry = self._load().get(path)
+        if entry is None or mtime_ns >= self._saved_ns:
+            return None
+        cached_size, cached_mtime_ns, digest = entry
+        if cached_size != size or cached_mtime_ns != mtime_ns:
+            return None
+        return digest
+
+    def set(self, path: str, size: int, mtime_ns: int, digest: str) -> None:
+        with self._lock:
+            self._load()[path] = [size, mtime_ns, digest]
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache to disk, atomically, if any entries have changed"""
+
+        import json
+        import tempfile
+
+        with self._lock:
+            if not self._dirty:
+                return
+            saved_ns = time.time_ns()
+            dirname = os.path.dirname(self.path)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".fz-", dir=dirname or None)
+            try:
+                with os.fdopen(fd, "w") as fid:
+                    json.dump(
+                        {
+                            "version": STAT_CACHE_VERSION,
+                            "saved_ns": saved_ns,
+                            "entries": self._entries,
+                        },
+                        fid,
+                    )
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._saved_ns = saved_ns
+            self._dirty = False
@@ -0,0 +1,73 @@
+import os
+from os import path
+
+from .statcache import StatCache, file_digest
+
+
+def test_file_digest(tmp_path):
+    filename = path.join(tmp_path, "my_file.txt")
+    with open(filename, "w") as fid:
+        fid.write("Some content")
+
+    assert file_digest(lambda: open(filename, "rb")) == file_digest(
+        lambda: open(filename, "rb")
+    )
+    assert len(file_digest(lambda: open(filename, "rb"))) == 32
+
+
+def test_stat_cache_round_trip(tmp_path):
+    cache_path = path.join(tmp_path, ".flaskerize", "cache")
+    cache = StatCache(cache_path)
+    cache.set("a.txt", 3, 1000, "digest")
+    cache.save()
+
+    reloaded = StatCache(cache_path)
+    assert reloaded.get("a.txt", 3, 1000) == "digest"
+    assert reloaded.get("a.txt", 4, 1000) is None
+    assert reloaded.get("a.txt", 3, 2000) is None
+    assert reloaded.get("b.txt", 3, 1000) is None
+
+
+def test_stat_cache_distrusts_entries_modified_after_save(tmp_path):
+    import time
+
+    cache_path = path.join(tmp_path, "cache")
+    future_ns = time.time_ns() + 10 ** 12
+    cache = StatCache(cache_path)
+    cache.set("a.txt", 3, future_ns, "digest")
+    cache.save()
+
+    assert StatCache(cache_path).get("a.txt", 3, future_ns) is None
+
+
+def test_stat_cache_ignores_corrupt_file(tmp_path):
+    cache_path = path.join(tmp_path, "cache")
+    with open(cache_path, "w") as fid:
+        fid.write("not json")
+
+    assert StatCache(cache_path).get("a.txt", 3, 1000) is None
+
+
+def test_stat_cache_path_is_outside_project(tmp_path):
+    from .statcache import get_stat_cache_path
+
+    project = path.join(tmp_path, "project")
+    other = path.join(tmp_path, "other")
+
+    cache_path = get_stat_cache_path(project)
+
+    assert not cache_path.startswith(project)
+    assert cache_path == get_stat_cache_path(project + "/")
+    assert cache_path != get_stat_cache_path(other)
+
+
+def test_generate_leaves_no_state_in_project(tmp_path):
+    from .parser import Flaskerize
+
+    project = path.join(tmp_path, "project")
+    os.makedirs(project)
+
+    Flaskerize(f"fz generate setup test --from-dir {project}".split())
+    Flaskerize(f"fz generate setup test --from-dir {project}".split())
+
+    assert os.listdir(project) == ["setup.py"]
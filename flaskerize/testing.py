@@ -0,0 +1,104 @@
+from typing import Any, Dict, List, Optional, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from flaskerize.render import RenderedFile
+
+
+class RenderResult(Dict[str, "RenderedFile"]):
+    """Files staged by a SchematicTestRunner render, keyed by path"""
+
+    def __missing__(self, path: str) -> "RenderedFile":
+        raise KeyError(f"{path!r} was not rendered; rendered files are {sorted(self)}")
+
+    def paths(self, status: Optional[str] = None) -> List[str]:
+        """Get the sorted paths of all files, or of those with the given status"""
+
+        return sorted(p for p, f in self.items() if status in (None, f.status))
+
+    def read_text(self, path: str) -> str:
+        """Get the contents of a staged file as text"""
+
+        text = self[path].text
+        if text is None:
+            raise KeyError(f"{path!r} was deleted")
+        return text
+
+
+class SchematicTestRunner:
+    """
+    Render a schematic from tests entirely in memory, as an alternative to running
+    `Flaskerize` against a temporary directory. The project being rendered into is
+    given as a mapping of path to contents, and nothing is written to disk.
+
+    Example:
+
+        def test_entity():
+            runner = SchematicTestRunner("flaskerize:entity")
+            result = runner.render("app/widget", files={"app/__init__.py": ""})
+            assert result["app/widget/model.py"].status == "created"
+            assert "class Widget" in result.read_text("app/widget/model.py")
+    """
+
+    def __init__(
+        self,
+        schematic: str,
+        files: Optional[Dict[str, Union[str, bytes]]] = None,
+    ):
+        """
+        Args:
+            schematic (str): schematic to render, as for `fz generate`, i.e. a
+                'package_name:schematic' name, or a path to a schematic directory or
+                pack, which if relative is relative to the working directory
+            files (Dict[str, Union[str, bytes]], optional): default contents of
+                the project rendered into. Defaults to None, for an empty project.
+        """
+
+        import os
+
+        from flaskerize.parser import Flaskerize, _is_pathlike
+
+        if _is_pathlike(schematic) and os.path.exists(schematic):
+            self.schematic_path = os.path.abspath(schematic)
+        else:
+            self.schematic_path = Flaskerize()._check_get_schematic_path_from_name(
+                schematic
+            )
+        self.files = dict(files or {})
+
+    def render(
+        self,
+        name: str,
+        args: Optional[List[Any]] = None,
+        files: Optional[Dict[str, Union[str, bytes]]] = None,
+    ) -> RenderResult:
+        """
+        Render the schematic
+
+        Args:
+            name (str): name of the resource to render, which as with `fz generate`
+                may include the directory to render into, e.g. "app/widget"
+            args (List[Any], optional): schematic arguments, as given on the command
+                line. Defaults to None, for no arguments.
+            files (Dict[str, Union[str, bytes]], optional): contents of the project
+                rendered into, overriding the runner's files by path. Defaults to
+                None.
+
+        Returns:
+            RenderResult: each staged or deleted file, keyed by its path relative to
+                the project root
+        """
+
+        import os
+
+        from flaskerize.render import render_in_memory
+
+        output_prefix, name = os.path.split(name)
+        return RenderResult(
+            render_in_memory(
+                self.schematic_path,
+                name,
+                args=args,
+                output_prefix=output_prefix,
+                files={**self.files, **(files or {})},
+            )
+        )
@@ -0,0 +1,66 @@
+from os import path
+
+from pytest import fixture, raises
+
+from .testing import SchematicTestRunner
+
+
+@fixture
+def runner(schematic_path):
+    return SchematicTestRunner(schematic_path, files={"README.md": "# Project"})
+
+
+def test_render_splits_output_directory_from_name(runner):
+    result = runner.render("sub/dir/thing", args=["Hello"])
+
+    assert result.paths() == ["sub/dir/thing.txt"]
+    assert result.read_text("sub/dir/thing.txt") == "Hello thing!"
+
+
+def test_render_compares_against_files(runner):
+    first = runner.render("thing", args=["Hello"], files={"thing.txt": "Hello thing!"})
+    second = runner.render("thing", args=["Hi"], files={"thing.txt": "Hello thing!"})
+
+    assert first.paths("unchanged") == ["thing.txt"]
+    assert second.paths("modified") == ["thing.txt"]
+    assert second.paths("created") == []
+
+
+def test_render_result_reports_missing_paths(runner):
+    result = runner.render("thing", args=["Hello"])
+
+    with raises(KeyError, match="thing.txt"):
+        result["other.txt"]
+
+
+def test_runner_resolves_schematic_names():
+    result = SchematicTestRunner("flaskerize:entity").render("app/widget")
+
+    assert result["app/widget/model.py"].status == "created"
+    assert "class Widget" in result.read_text("app/widget/model.py")
+
+
+def test_runner_resolves_relative_schematic_paths(
+    schematic_path, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+
+    runner = SchematicTestRunner("schematics/doodad")
+    monkeypatch.chdir(path.dirname(tmp_path))
+    result = runner.render("thing", args=["Hello"])
+
+    assert runner.schematic_path == schematic_path
+    assert result.read_text("thing.txt") == "Hello thing!"
+
+
+def test_runner_renders_setup_schematic():
+    result = SchematicTestRunner("setup").render(
+        "test",
+        args="--install-requires thingy>0.3.0 --author AJ".split(),
+    )
+
+    assert result.paths() == ["setup.py"]
+    content = result.read_text("setup.py")
+    assert 'name="test"' in content
+    assert 'author="AJ"' in content
+    assert "install_requires=['thingy>0.3.0']" in content
@@ -32,3 +32,40 @@ def split_file_factory(
         # Case where user provides filename without .py (gunicorn style)
         filename = filename + ".py"
     return filename, func
+
+
+def default_cache_dir(*parts: str) -> str:
+    """
+    Get the root directory for persistent flaskerize caches. Honors the
+    FLASKERIZE_CACHE_DIR and XDG_CACHE_HOME environment variables.
+    """
+
+    import os
+
+    root = os.environ.get("FLASKERIZE_CACHE_DIR")
+    if not root:
+        xdg_cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        root = os.path.join(xdg_cache, "flaskerize")
+    return os.path.join(root, *parts)
+
+
+def get_umask() -> int:
+    """
+    Get the umask of this process. Where possible it is read without being set, as
+    setting it, even briefly, affects files being created on other threads.
+    """
+
+    import os
+
+    try:
+        with open("/proc/self/status", "r") as fid:
+            for line in fid:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask